@@ -1,79 +1,55 @@
 """Slack Bolt application for coordinating CLIF project runs."""
 from __future__ import annotations
 
+from clif_bot import startup  # first, so the start-up timings include imports
+
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from slack_bolt import App
-from slack_bolt.adapter.socket_mode import SocketModeHandler
-import requests
 
 from clif_bot.metadata import parse_repo
-from clif_bot.state import StatusStore
-from clif_bot import mcide
+from clif_bot.state import StatusStore, archive_job
+from clif_bot import CLIF_REPO, github, issues, mcide, metrics, recording, reminders, stats, tracing, views
 
+startup.mark("imports")
 load_dotenv()
 
 
-app = App(token=os.environ.get("SLACK_BOT_TOKEN"), signing_secret=os.environ.get("SLACK_SIGNING_SECRET"))
-store = StatusStore()
+with startup.phase("app"):
+    app = App(
+        token=os.environ.get("SLACK_BOT_TOKEN"),
+        signing_secret=os.environ.get("SLACK_SIGNING_SECRET"),
+        # Set SLACK_VERIFY_TOKEN=0 to skip the eager auth.test call, e.g. when
+        # running the handlers offline against fake clients.
+        token_verification_enabled=os.environ.get("SLACK_VERIFY_TOKEN", "1") != "0",
+    )
+    if os.environ.get("SLACK_API_URL"):
+        # Point the Web API at another server, e.g. the fake Slack API used by
+        # benchmarks/replay.py.  Bolt copies this into each request's client.
+        app.client.base_url = os.environ["SLACK_API_URL"]
+    if os.environ.get("CLIF_RECORD_FILE"):
+        app.use(recording.middleware(os.environ["CLIF_RECORD_FILE"]))
+    # For Web API calls made outside a listener's injected client.
+    web_client = tracing.TracedClient(app.client)
+with startup.phase("state"):
+    store = StatusStore(
+        os.environ.get("CLIF_BOT_DATA_FILE", "clif_bot_data.json"),
+        archive_after_days=float(os.environ["CLIF_ARCHIVE_AFTER_DAYS"]) if os.environ.get("CLIF_ARCHIVE_AFTER_DAYS") else None,
+    )
+    # Not read until warm_up() or the first search.
+    issue_index = issues.IssueIndex(os.environ.get("CLIF_ISSUE_INDEX_FILE", "clif_issues_index.json"))
 
 
 @app.command("/clif-run")
+@tracing.trace_listener("/clif-run")
+@metrics.instrument_listener("/clif-run")
 def handle_clif_run(ack, respond, command, client):
     ack()
     
     # Open modal for project details (no URL parameter needed)
-    modal_view = {
-        "type": "modal",
-        "callback_id": "clif_project_modal",
-        "title": {"type": "plain_text", "text": "CLIF Project Release"},
-        "submit": {"type": "plain_text", "text": "Release Project"},
-        "close": {"type": "plain_text", "text": "Cancel"},
-        "blocks": [
-            {
-                "type": "input",
-                "block_id": "github_url_block",
-                "element": {
-                    "type": "plain_text_input",
-                    "action_id": "github_url",
-                    "placeholder": {"type": "plain_text", "text": "https://github.com/Common-Longitudinal-ICU-data-Format/project-name"}
-                },
-                "label": {"type": "plain_text", "text": "GitHub Repository URL"}
-            },
-            {
-                "type": "input",
-                "block_id": "project_name_block",
-                "element": {
-                    "type": "plain_text_input",
-                    "action_id": "project_name",
-                    "placeholder": {"type": "plain_text", "text": "Enter project name"}
-                },
-                "label": {"type": "plain_text", "text": "Project Name"}
-            },
-            {
-                "type": "input",
-                "block_id": "result_box_block",
-                "element": {
-                    "type": "plain_text_input",
-                    "action_id": "result_box_link",
-                    "placeholder": {"type": "plain_text", "text": "Enter result box link"}
-                },
-                "label": {"type": "plain_text", "text": "Result Box Link"}
-            },
-            {
-                "type": "input",
-                "block_id": "special_instructions_block",
-                "element": {
-                    "type": "plain_text_input",
-                    "action_id": "special_instructions",
-                    "multiline": True,
-                    "placeholder": {"type": "plain_text", "text": "Enter any special instructions"}
-                },
-                "label": {"type": "plain_text", "text": "Special Instructions"},
-                "optional": True
-            }
-        ]
-    }
+    modal_view = views.render("clif_project_modal")
     
     try:
         client.views_open(trigger_id=command["trigger_id"], view=modal_view)
@@ -81,131 +57,86 @@ def handle_clif_run(ack, respond, command, client):
         respond(f"Error opening modal: {str(e)}")
 
 @app.command("/mCIDE")
+@tracing.trace_listener("/mCIDE")
+@metrics.instrument_listener("/mCIDE")
 def handle_mcide(ack, respond, command, client):
-    """Open modal for adding a new mCIDE category level."""
+    """Open modal for adding a new mCIDE category level.
+
+    ``/mCIDE diff <ref1> <ref2>`` instead reports the values added and
+    removed between two branches, tags or commits.
+    """
     ack()
+    args = (command.get("text") or "").split()
+    if args and args[0].lower() == "diff":
+        if len(args) != 3:
+            respond("Usage: `/mCIDE diff <ref1> <ref2>` (branches, tags or commit SHAs)")
+            return
+        try:
+            _, _, diffs = mcide.diff(args[1], args[2])
+            respond(mcide.format_diff(args[1], args[2], diffs))
+        except Exception as e:
+            respond(f"Error comparing mCIDE versions: {e}")
+        return
     try:
         tables = mcide.fetch_tables()
         if not tables:
             respond("No tables available.")
             return
-        table_options = [
-            {"text": {"type": "plain_text", "text": t}, "value": t}
-            for t in tables
-        ]
-        table = tables[0]
-        variables = mcide.fetch_variables(table)
-        variable_options = [
-            {"text": {"type": "plain_text", "text": v}, "value": v}
-            for v in variables
-        ]
-        variable = variables[0] if variables else ""
-        values = mcide.fetch_category_values(table, variable) if variable else []
-
-        modal_view = {
-            "type": "modal",
-            "callback_id": "mcide_modal",
-            "title": {"type": "plain_text", "text": "mCIDE"},
-            "submit": {"type": "plain_text", "text": "Submit"},
-            "close": {"type": "plain_text", "text": "Cancel"},
-            "blocks": [
-                {
-                    "type": "input",
-                    "block_id": "table_block",
-                    "element": {
-                        "type": "static_select",
-                        "action_id": "mcide_table_select",
-                        "options": table_options,
-                        "initial_option": {
-                            "text": {"type": "plain_text", "text": table},
-                            "value": table,
-                        },
-                    },
-                    "label": {"type": "plain_text", "text": "CLIF Table"},
-                },
-                {
-                    "type": "input",
-                    "block_id": "variable_block",
-                    "element": {
-                        "type": "static_select",
-                        "action_id": "mcide_variable_select",
-                        "options": variable_options,
-                        "initial_option": {
-                            "text": {"type": "plain_text", "text": variable},
-                            "value": variable,
-                        } if variable else None,
-                    },
-                    "label": {"type": "plain_text", "text": "Category Variable"},
-                    "optional": False,
-                },
-                {
-                    "type": "section",
-                    "block_id": "values_block",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": "*Existing values:* " + ", ".join(values) if values else "*Existing values:*",
-                    },
-                },
-                {
-                    "type": "input",
-                    "block_id": "new_value_block",
-                    "element": {
-                        "type": "plain_text_input",
-                        "action_id": "new_value",
-                    },
-                    "label": {"type": "plain_text", "text": "New Value"},
-                },
-            ],
-        }
-
+        table_options = views.text_options(tables)
+        variables = mcide.fetch_variables(tables[0])
+        variable_options = views.text_options(variables)
+        values = mcide.fetch_category_values(tables[0], variables[0]) if variables else []
+        modal_view = views.render(
+            "mcide_modal",
+            table_options=table_options,
+            table=table_options[0],
+            variable_options=variable_options,
+            variable=variable_options[0] if variables else None,
+            values_text=views.values_text(values),
+        )
         client.views_open(trigger_id=command["trigger_id"], view=modal_view)
     except Exception as e:
         respond(f"Error opening modal: {e}")
 
 
 @app.action("mcide_table_select")
+@tracing.trace_listener("mcide_table_select")
+@metrics.instrument_listener("mcide_table_select")
 def mcide_table_changed(ack, body, client):
     ack()
     table = body["actions"][0]["selected_option"]["value"]
     variables = mcide.fetch_variables(table)
-    variable_options = [
-        {"text": {"type": "plain_text", "text": v}, "value": v}
-        for v in variables
-    ]
-    variable = variables[0] if variables else ""
-    values = mcide.fetch_category_values(table, variable) if variable else []
+    variable_options = views.text_options(variables)
+    values = mcide.fetch_category_values(table, variables[0]) if variables else []
 
     view = body["view"]
     view["blocks"][1]["element"]["options"] = variable_options
-    if variable:
-        view["blocks"][1]["element"]["initial_option"] = {
-            "text": {"type": "plain_text", "text": variable},
-            "value": variable,
-        }
-    view["blocks"][2]["text"]["text"] = (
-        "*Existing values:* " + ", ".join(values) if values else "*Existing values:*"
-    )
+    if variables:
+        view["blocks"][1]["element"]["initial_option"] = variable_options[0]
+    view["blocks"][2]["text"]["text"] = views.values_text(values)
     client.views_update(
         view_id=body["view"]["id"], hash=body["view"]["hash"], view=view
     )
 
 
 @app.action("mcide_variable_select")
+@tracing.trace_listener("mcide_variable_select")
+@metrics.instrument_listener("mcide_variable_select")
 def mcide_variable_changed(ack, body, client):
     ack()
     table = body["view"]["state"]["values"]["table_block"]["mcide_table_select"]["selected_option"]["value"]
     variable = body["actions"][0]["selected_option"]["value"]
     values = mcide.fetch_category_values(table, variable)
     view = body["view"]
-    view["blocks"][2]["text"]["text"] = (
-        "*Existing values:* " + ", ".join(values) if values else "*Existing values:*"
-    )
+    view["blocks"][2]["text"]["text"] = views.values_text(values)
     client.views_update(
         view_id=body["view"]["id"], hash=body["view"]["hash"], view=view
     )
 
 
 @app.view("mcide_modal")
+@tracing.trace_listener("mcide_modal")
+@metrics.instrument_listener("mcide_modal")
 def handle_mcide_submission(ack, body, client):
     ack()
     state = body["view"]["state"]["values"]
@@ -218,8 +149,11 @@ def handle_mcide_submission(ack, body, client):
         client.chat_postMessage(channel=user_id, text=f"Created PR: {pr_url}")
     except Exception as e:
         client.chat_postMessage(channel=user_id, text=f"Error updating categories: {e}")
-=======
+
+
 @app.view("clif_issue_modal")
+@tracing.trace_listener("clif_issue_modal")
+@metrics.instrument_listener("clif_issue_modal")
 def handle_issue_submission(ack, body, client):
     ack()
 
@@ -235,9 +169,7 @@ def handle_issue_submission(ack, body, client):
         client.chat_postMessage(channel=user_id, text="GITHUB_TOKEN is not set.")
         return
 
-    url = (
-        "https://api.github.com/repos/Common-Longitudinal-ICU-data-Format/CLIF/issues"
-    )
+    url = f"{github.API_URL}/repos/{CLIF_REPO}/issues"
     headers = {
         "Authorization": f"Bearer {token}",
         "Accept": "application/vnd.github+json",
@@ -245,9 +177,11 @@ def handle_issue_submission(ack, body, client):
     payload = {"title": title, "body": description}
 
     try:
-        response = requests.post(url, headers=headers, json=payload)
+        response = github.post(url, headers=headers, json=payload)
         if response.status_code == 201:
-            issue_url = response.json().get("html_url")
+            created = response.json()
+            issue_index.upsert(created)
+            issue_url = created.get("html_url")
             client.chat_postMessage(channel=user_id, text=f"Issue created: {issue_url}")
         else:
             client.chat_postMessage(
@@ -259,40 +193,12 @@ def handle_issue_submission(ack, body, client):
 
 
 @app.command("/clif-issues")
+@tracing.trace_listener("/clif-issues")
+@metrics.instrument_listener("/clif-issues")
 def handle_clif_issues(ack, respond, command, client):
     ack()
 
-    modal_view = {
-        "type": "modal",
-        "callback_id": "clif_issue_modal",
-        "title": {"type": "plain_text", "text": "New CLIF Issue"},
-        "submit": {"type": "plain_text", "text": "Create Issue"},
-        "close": {"type": "plain_text", "text": "Cancel"},
-        "blocks": [
-            {
-                "type": "input",
-                "block_id": "title_block",
-                "element": {
-                    "type": "plain_text_input",
-                    "action_id": "title_input",
-                    "placeholder": {"type": "plain_text", "text": "Enter issue title"},
-                },
-                "label": {"type": "plain_text", "text": "Title"},
-            },
-            {
-                "type": "input",
-                "block_id": "description_block",
-                "element": {
-                    "type": "plain_text_input",
-                    "action_id": "description_input",
-                    "multiline": True,
-                    "placeholder": {"type": "plain_text", "text": "Describe the issue"},
-                },
-                "label": {"type": "plain_text", "text": "Description"},
-                "optional": True,
-            },
-        ],
-    }
+    modal_view = views.issue_view()
 
     try:
         client.views_open(trigger_id=command["trigger_id"], view=modal_view)
@@ -300,9 +206,39 @@ def handle_clif_issues(ack, respond, command, client):
         respond(f"Error opening modal: {str(e)}")
 
 
+@app.action("title_input")
+@tracing.trace_listener("title_input")
+@metrics.instrument_listener("title_input")
+def handle_issue_title_typed(ack, body, client):
+    """Show likely duplicates from the local issue index as the title is typed."""
+    ack()
+    title = body["actions"][0].get("value") or ""
+    matches = issue_index.search(title)
+    text = issues.format_duplicates(matches) if matches else None
+    view = body["view"]
+    current = next(
+        (block["text"]["text"] for block in view["blocks"] if block.get("block_id") == "duplicates_block"), None
+    )
+    if text == current:
+        return
+    try:
+        client.views_update(view_id=view["id"], hash=view["hash"], view=views.issue_view(text))
+    except Exception as e:
+        # A newer keystroke may already have updated the view (hash conflict).
+        print(f"Error updating issue modal: {e}")
+
+
 @app.command("/clif-status")
+@tracing.trace_listener("/clif-status")
+@metrics.instrument_listener("/clif-status")
 def handle_clif_status(ack, respond, command):
     ack()
+    args = (command.get("text") or "").split()
+    if args and args[0].lower() == "archived":
+        page = max(1, int(args[1])) if len(args) > 1 and args[1].isdigit() else 1
+        respond(archived_status_page(page))
+        return
+
     status_table = store.status_table()
     if status_table == "No active projects.":
         respond(status_table)
@@ -311,7 +247,7 @@ def handle_clif_status(ack, respond, command):
     # Post the status table to the channel as a public message
     channel = os.environ.get("JOB_TRACKER_CHANNEL", "#project-tracker")
     try:
-        app.client.chat_postMessage(
+        web_client.chat_postMessage(
             channel=channel, 
             text=f"📊 CLIF Project Status Dashboard\n```\n{status_table}\n```"
         )
@@ -321,82 +257,64 @@ def handle_clif_status(ack, respond, command):
         respond(f"```\n{status_table}\n```")
 
 
+def archived_status_page(page: int, per_page: int = 20) -> str:
+    """Render one page of archived projects for ``/clif-status archived [page]``."""
+    entries, has_more = store.archived_projects(page, per_page)
+    if not entries:
+        return "No archived projects." if page == 1 else f"No archived projects on page {page}."
+    lines = [f"🗄 *Archived CLIF projects* (page {page})"]
+    for repo_url, archived_at, project in entries:
+        statuses = project.site_status.values()
+        lines.append(
+            f"• *{project.metadata.project_name}* – {repo_url} – "
+            f"✅ {sum(s == '✅' for s in statuses)} / ❌ {sum(s == '❌' for s in statuses)} – "
+            f"archived {time.strftime('%Y-%m-%d', time.localtime(archived_at))}"
+        )
+    if has_more:
+        lines.append(f"Use `/clif-status archived {page + 1}` for more.")
+    return "\n".join(lines)
+
+
+@app.command("/clif-stats")
+@tracing.trace_listener("/clif-stats")
+@metrics.instrument_listener("/clif-stats")
+def handle_clif_stats(ack, respond, command):
+    """Show per-site status counts and completion latency from the rollups."""
+    ack()
+    rollups = store.events.snapshot()
+    if not rollups.events_total:
+        respond("No status changes recorded yet.")
+        return
+    respond(
+        f"📈 *CLIF Project Stats* ({rollups.events_total} status events)\n"
+        f"```\n{stats.stats_table(rollups)}\n```\n"
+        "p50/p90 done: time from project release to ✅."
+    )
+
+
+@app.command("/clif-ratelimit")
+@tracing.trace_listener("/clif-ratelimit")
+@metrics.instrument_listener("/clif-ratelimit")
+def handle_clif_ratelimit(ack, respond, command):
+    """Report the remaining GitHub API budget."""
+    ack()
+    authenticated = "authenticated" if os.environ.get("GITHUB_TOKEN") else "unauthenticated"
+    hit_ratio = metrics.cache_hit_ratio("github")
+    respond(
+        f"GitHub API budget ({authenticated}):\n```\n{github.BUDGET.summary()}\n```\n"
+        f"Cached read hit ratio: {hit_ratio:.0%}"
+    )
+
+
 @app.command("/clif-site-poc")
+@tracing.trace_listener("/clif-site-poc")
+@metrics.instrument_listener("/clif-site-poc")
 def handle_clif_site_poc(ack, respond, command, client):
     ack()
     
-    # Create site options for dropdown
-    site_options = []
-    for site in ["University of Chicago", "Emory University", "John Hopkins University", 
-                 "Northwestern University", "Oregon Health & Science University", "Rush University",
-                 "University of California San Francisco", "University of Michigan", 
-                 "University of Minnesota", "University of Pennsylvania", "University of Toronto", "MIMIC-IV"]:
-        site_options.append({
-            "text": {"type": "plain_text", "text": site},
-            "value": site
-        })
-    
-    # Create project options from active projects
-    project_options = [
-        {
-            "text": {"type": "plain_text", "text": "General (all projects)"},
-            "value": "General"
-        }
-    ]
-    
-    # Add active projects to dropdown
-    for repo_url, project_status in store.projects.items():
-        project_name = project_status.metadata.project_name
-        # Truncate long project names for dropdown
-        display_name = project_name[:50] + "..." if len(project_name) > 50 else project_name
-        project_options.append({
-            "text": {"type": "plain_text", "text": display_name},
-            "value": project_name
-        })
-    
-    # Open modal for POC assignment
-    modal_view = {
-        "type": "modal",
-        "callback_id": "clif_site_poc_modal",
-        "title": {"type": "plain_text", "text": "Assign Site POC"},
-        "submit": {"type": "plain_text", "text": "Assign POC"},
-        "close": {"type": "plain_text", "text": "Cancel"},
-        "blocks": [
-            {
-                "type": "input",
-                "block_id": "site_block",
-                "element": {
-                    "type": "static_select",
-                    "placeholder": {"type": "plain_text", "text": "Select a CLIF site"},
-                    "options": site_options,
-                    "action_id": "site_select"
-                },
-                "label": {"type": "plain_text", "text": "CLIF Site"}
-            },
-            {
-                "type": "input",
-                "block_id": "user_block",
-                "element": {
-                    "type": "users_select",
-                    "placeholder": {"type": "plain_text", "text": "Select a user"},
-                    "action_id": "user_select"
-                },
-                "label": {"type": "plain_text", "text": "Point of Contact"}
-            },
-            {
-                "type": "input",
-                "block_id": "project_block",
-                "element": {
-                    "type": "static_select",
-                    "placeholder": {"type": "plain_text", "text": "Select a project"},
-                    "options": project_options,
-                    "action_id": "project_select"
-                },
-                "label": {"type": "plain_text", "text": "Project"},
-                "optional": True
-            }
-        ]
-    }
+    # Site options come from state.SITES; project options are rebuilt only
+    # when the set of active projects changes.
+    modal_view = views.render("clif_site_poc_modal", project_options=views.project_options(store))
     
     try:
         client.views_open(trigger_id=command["trigger_id"], view=modal_view)
@@ -405,43 +323,13 @@ def handle_clif_site_poc(ack, respond, command, client):
 
 
 @app.command("/clif-help")
+@tracing.trace_listener("/clif-help")
+@metrics.instrument_listener("/clif-help")
 def handle_clif_help(ack, command, client, respond):
     """Open a modal for users to request CLIF assistance."""
     ack()
 
-    modal_view = {
-        "type": "modal",
-        "callback_id": "clif_help_modal",
-        "title": {"type": "plain_text", "text": "Request CLIF Help"},
-        "submit": {"type": "plain_text", "text": "Submit Ticket"},
-        "close": {"type": "plain_text", "text": "Cancel"},
-        "blocks": [
-            {
-                "type": "input",
-                "block_id": "summary_block",
-                "element": {
-                    "type": "plain_text_input",
-                    "action_id": "summary_input",
-                    "placeholder": {"type": "plain_text", "text": "Brief summary"},
-                },
-                "label": {"type": "plain_text", "text": "Summary"},
-            },
-            {
-                "type": "input",
-                "block_id": "details_block",
-                "element": {
-                    "type": "plain_text_input",
-                    "action_id": "details_input",
-                    "multiline": True,
-                    "placeholder": {
-                        "type": "plain_text",
-                        "text": "Describe your issue or question",
-                    },
-                },
-                "label": {"type": "plain_text", "text": "Details"},
-            },
-        ],
-    }
+    modal_view = views.render("clif_help_modal")
 
     try:
         client.views_open(trigger_id=command["trigger_id"], view=modal_view)
@@ -450,6 +338,8 @@ def handle_clif_help(ack, command, client, respond):
 
 
 @app.view("clif_project_modal")
+@tracing.trace_listener("clif_project_modal")
+@metrics.instrument_listener("clif_project_modal")
 def handle_modal_submission(ack, body, client):
     ack()
     
@@ -555,6 +445,8 @@ def handle_modal_submission(ack, body, client):
 
 
 @app.view("clif_site_poc_modal")
+@tracing.trace_listener("clif_site_poc_modal")
+@metrics.instrument_listener("clif_site_poc_modal")
 def handle_site_poc_modal_submission(ack, body, client):
     ack()
     
@@ -597,6 +489,8 @@ def handle_site_poc_modal_submission(ack, body, client):
 
 
 @app.view("clif_help_modal")
+@tracing.trace_listener("clif_help_modal")
+@metrics.instrument_listener("clif_help_modal")
 def handle_help_modal_submission(ack, body, client):
     """Post submitted help requests to a dedicated channel."""
     ack()
@@ -621,6 +515,8 @@ def handle_help_modal_submission(ack, body, client):
 
 
 @app.action("status_update")
+@tracing.trace_listener("status_update")
+@metrics.instrument_listener("status_update")
 def handle_status_update(ack, body, respond):
     ack()
     user_id = body["user"]["id"]
@@ -630,13 +526,120 @@ def handle_status_update(ack, body, respond):
         return
     value = body["actions"][0]["value"]
     repo, status = value.split("|")
-    store.set_site_status(repo, site, status)
+    try:
+        # The project may be archived by a concurrent update, so rely on the
+        # store's KeyError rather than checking first.
+        store.set_site_status(repo, site, status)
+    except KeyError:
+        respond("This project has been archived and no longer accepts status updates.")
+        return
     respond(f"Status for {site} set to {status}")
 
 
+@app.command("/clif-my-projects")
+@tracing.trace_listener("/clif-my-projects")
+@metrics.instrument_listener("/clif-my-projects")
+def handle_clif_my_projects(ack, respond, command, client):
+    """Open a modal to update the caller's site status for all open projects at once.
+
+    ``/clif-my-projects <page>`` shows later pages when there are more open
+    projects than fit in one modal.
+    """
+    ack()
+    site = store.get_site_for_user(command["user_id"])
+    if not site:
+        respond("You are not registered as a POC. Use /clif-site-poc to register.")
+        return
+    text = (command.get("text") or "").strip()
+    if text and not (text.isdigit() and int(text) >= 1):
+        respond("Usage: `/clif-my-projects [page]`")
+        return
+    page = int(text or 1)
+    open_projects = [
+        (repo_url, project) for repo_url, project in store.items()
+        if project.get_status(site) in ("❓", "🛠")
+    ]
+    if not open_projects:
+        respond(f"No open projects for {site}.")
+        return
+    if (page - 1) * views.MAX_MODAL_PROJECTS >= len(open_projects):
+        respond(f"{site} only has {len(open_projects)} open projects; there is no page {page}.")
+        return
+    try:
+        client.views_open(trigger_id=command["trigger_id"], view=views.my_projects_view(site, open_projects, page))
+    except Exception as e:
+        respond(f"Error opening modal: {e}")
+
+
+@app.view("clif_my_projects_modal")
+@tracing.trace_listener("clif_my_projects_modal")
+@metrics.instrument_listener("clif_my_projects_modal")
+def handle_my_projects_submission(ack, body, client):
+    """Apply every selected status in one batch and confirm once."""
+    ack()
+    user_id = body["user"]["id"]
+    site = store.get_site_for_user(user_id)
+    if not site or site != body["view"].get("private_metadata"):
+        client.chat_postMessage(channel=user_id, text="You are no longer the POC for this site; nothing was updated.")
+        return
+    updates = {
+        repo_url: block["status_select"]["selected_option"]["value"]
+        for repo_url, block in body["view"]["state"]["values"].items()
+        if (block.get("status_select") or {}).get("selected_option")
+    }
+    # Finished projects are archived by the update, so look names up first.
+    names = {url: project.metadata.project_name for url, project in store.items() if url in updates}
+    try:
+        changed, skipped = store.set_site_statuses(site, updates)
+    except Exception as e:
+        client.chat_postMessage(channel=user_id, text=f"Error updating statuses: {e}")
+        return
+
+    if not changed:
+        lines = [f"No status changes for {site}."]
+    else:
+        lines = [f"Updated {len(changed)} project{'s' if len(changed) != 1 else ''} for {site}:"]
+        for event in changed:
+            lines.append(f"• {names.get(event.repo_url, event.repo_url)}: {event.old} → {event.new}")
+    if skipped:
+        lines.append(f"Skipped {len(skipped)} archived project{'s' if len(skipped) != 1 else ''}.")
+    client.chat_postMessage(channel=user_id, text="\n".join(lines))
+
+
+def warm_up() -> None:
+    """Work deferred until after the Socket Mode connection is up."""
+    try:
+        if store.loaded_from_snapshot:
+            store.archive_finished()
+        issue_index.load()
+        tables = mcide.fetch_tables()
+        if tables:
+            mcide.fetch_variables(tables[0])
+    except Exception as e:
+        print(f"Error warming caches: {e}")
+
+
 def main() -> None:
-    handler = SocketModeHandler(app, os.environ.get("SLACK_APP_TOKEN"))
-    handler.start()
+    from slack_bolt.adapter.socket_mode import SocketModeHandler
+
+    metrics_port = os.environ.get("METRICS_PORT")
+    if metrics_port:
+        metrics.start_http_server(int(metrics_port), os.environ.get("METRICS_HOST", "127.0.0.1"))
+    with startup.phase("connect"):
+        handler = SocketModeHandler(app, os.environ.get("SLACK_APP_TOKEN"))
+        handler.connect()
+    print(startup.report())
+    threading.Thread(target=tracing.propagate(warm_up), name="warm-up", daemon=True).start()
+    scheduler = reminders.Scheduler(os.path.splitext(store.data_file)[0] + "_schedule.json")
+    reminders.configure(web_client, store, scheduler)
+    if store.archive_after_days:
+        # warm_up() has just swept; later sweeps catch projects as they age.
+        scheduler.add("archive", archive_job(store), first_due=scheduler.clock() + 86400)
+    sync_minutes = float(os.environ.get("CLIF_ISSUE_SYNC_MINUTES", "10") or 0)
+    if sync_minutes > 0:
+        scheduler.add("issues", issues.sync_job(issue_index, sync_minutes * 60))
+    scheduler.start()
+    threading.Event().wait()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,422 @@
+"""Local stand-ins for GitHub and Slack used by the benchmarks.
+
+``FakeGitHub`` serves the subset of the GitHub REST API and
+raw.githubusercontent.com that the bot talks to from an in-process HTTP
+server.  Point the bot at it by exporting ``GITHUB_API_URL`` and
+``GITHUB_RAW_URL`` (see :meth:`FakeGitHub.env`) *before* importing
+``clif_bot``.  ``FakeSlackClient`` records Web API calls instead of sending
+them.  ``FakeSlackAPI`` serves the Slack Web API and ``response_url``
+webhooks over HTTP for the whole Bolt app; point the app at it with
+``SLACK_API_URL``.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from clif_bot import CLIF_REPO
+
+Route = Callable[[str, str, bytes, Dict[str, str]], Tuple[int, Any, Dict[str, str]]]
+
+
+def serve(route: Route) -> ThreadingHTTPServer:
+    """Serve ``route(method, path, body, headers)`` on ``127.0.0.1`` from a daemon thread.
+
+    ``route`` returns ``(status, body, headers)``.  A ``bytes`` or ``str``
+    body is sent as is, and anything else is encoded as JSON.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; with keep-alive
+        # connections Nagle + delayed ACK would add ~40ms per request.
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args: Any) -> None:  # keep benchmark output quiet
+            pass
+
+        def _handle(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            status, body, headers = route(self.command, self.path, self.rfile.read(length), dict(self.headers))
+            data = body if isinstance(body, bytes) else (
+                body.encode() if isinstance(body, str) else json.dumps(body).encode()
+            )
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = do_PATCH = _handle
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+
+        def handle_error(self, request, client_address) -> None:
+            # Clients (e.g. the streaming README parser) may hang up early.
+            pass
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _server_url(server: Optional[ThreadingHTTPServer]) -> str:
+    assert server is not None, "server not started"
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+class FakeGitHub:
+    """In-memory GitHub repository tree served over HTTP on ``127.0.0.1``."""
+
+    def __init__(self, tables: int = 10, variables: int = 3, values: int = 20) -> None:
+        # path within a repo -> text, keyed by "owner/repo"
+        self.repos: Dict[str, Dict[str, str]] = {CLIF_REPO: {}}
+        self.requests: List[Tuple[str, str]] = []
+        # Frozen copies of the CLIF repo: commit sha -> files, ref name -> sha.
+        self.commits: Dict[str, Dict[str, str]] = {}
+        self.refs: Dict[str, str] = {}
+        self.issues: List[Dict[str, Any]] = []
+        self.rate_limit = 5000
+        self._rate_remaining = self.rate_limit
+        # Set by exhaust_rate_limit(): the status API calls are answered with.
+        self._limited_status: Optional[int] = None
+        self._lock = threading.Lock()
+        for t in range(tables):
+            table = f"table{t:02d}"
+            for v in range(variables):
+                var = f"var{v}_category"
+                rows = ["category"] + [f"value_{t}_{v}_{i}" for i in range(values)]
+                self.add_file(CLIF_REPO, f"mCIDE/{table}/clif_{table}_{var}_categories.csv", "\n".join(rows) + "\n")
+            self.add_file(CLIF_REPO, f"mCIDE/{table}/README.md", f"# {table}\n")
+        self.add_file(CLIF_REPO, "mCIDE/00_template/README.md", "template\n")
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # --- fixture helpers ------------------------------------------------
+    def add_file(self, repo: str, path: str, text: str) -> None:
+        self.repos.setdefault(repo, {})[path] = text
+
+    def add_project(self, repo: str, kind: str, readme_lines: int = 50) -> str:
+        """Create a project repo described by ``project.yaml``, ``metadata.json`` or ``README.md``.
+
+        Returns the ``https://github.com/...`` URL that ``parse_repo`` expects.
+        """
+        name = repo.split("/")[-1]
+        if kind == "yaml":
+            self.add_file(
+                repo,
+                "project.yaml",
+                f"project_name: {name}\ndescription: Benchmark project\n"
+                "tables_required:\n  - patient\n  - hospitalization\n  - vitals\n",
+            )
+        elif kind == "json":
+            self.add_file(
+                repo,
+                "metadata.json",
+                json.dumps({"name": name, "description": "Benchmark project", "tables_required": ["patient", "labs"]}),
+            )
+        else:
+            body = [f"# {name}", "", "Benchmark project description.", "", "Tables required: patient, labs, vitals", ""]
+            body += [f"Filler line {i} with some text to scan." for i in range(readme_lines)]
+            self.add_file(repo, "README.md", "\n".join(body) + "\n")
+        return f"https://github.com/{repo}"
+
+    def add_issue(self, title: str, body: str = "", state: str = "open", updated_at: Optional[str] = None) -> Dict[str, Any]:
+        number = len(self.issues) + 1
+        issue = {
+            "number": number,
+            "title": title,
+            "body": body,
+            "state": state,
+            "html_url": f"https://github.com/{CLIF_REPO}/issues/{number}",
+            "updated_at": updated_at or f"2024-01-01T00:{number // 60 % 60:02d}:{number % 60:02d}Z",
+        }
+        self.issues.append(issue)
+        return issue
+
+    def exhaust_rate_limit(self, status: int = 403) -> None:
+        """Answer further API calls with ``status`` and no remaining budget, as GitHub does."""
+        with self._lock:
+            self._rate_remaining = 0
+            self._limited_status = status
+
+    def tag(self, ref: str) -> str:
+        """Freeze the current CLIF files as a commit reachable as ``ref``; returns its SHA."""
+        files = dict(self.repos[CLIF_REPO])
+        sha = hashlib.sha1(json.dumps(sorted(files.items())).encode()).hexdigest()
+        self.commits[sha] = files
+        self.refs[ref] = sha
+        return sha
+
+    def _files_at(self, repo: str, ref: str) -> Dict[str, str]:
+        if repo == CLIF_REPO:
+            sha = self.refs.get(ref, ref)
+            if sha in self.commits:
+                return self.commits[sha]
+        return self.repos.get(repo, {})
+
+    # --- server lifecycle -----------------------------------------------
+    def start(self) -> "FakeGitHub":
+        def route(method: str, path: str, body: bytes, headers: Dict[str, str]) -> Tuple[int, Any, Dict[str, str]]:
+            return self.route(method, path, json.loads(body) if body else None, headers)
+
+        self._server = serve(route)
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def url(self) -> str:
+        return _server_url(self._server)
+
+    def env(self) -> Dict[str, str]:
+        return {"GITHUB_API_URL": f"{self.url}/api", "GITHUB_RAW_URL": f"{self.url}/raw"}
+
+    # --- routing --------------------------------------------------------
+    def _rate_headers(self) -> Dict[str, str]:
+        with self._lock:
+            self._rate_remaining = max(0, self._rate_remaining - 1)
+            remaining = self._rate_remaining
+        return {
+            "Content-Type": "application/json",
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": "4102444800",
+            "X-RateLimit-Resource": "core",
+        }
+
+    def route(self, method: str, path: str, payload: Any, headers: Dict[str, str]) -> Tuple[int, Any, Dict[str, str]]:
+        self.requests.append((method, path))
+        parts = urlsplit(path)
+        route = parts.path
+        if route.startswith("/raw/"):
+            match = re.match(r"^/raw/([^/]+/[^/]+)/([^/]+)/(.+)$", route)
+            if match:
+                text = self._files_at(match.group(1), match.group(2)).get(match.group(3))
+                if text is not None:
+                    return 200, text, {"Content-Type": "text/plain; charset=utf-8"}
+            return 404, "404: Not Found", {"Content-Type": "text/plain"}
+        if not route.startswith("/api/"):
+            return 404, {"message": "Not Found"}, {}
+        status, body, response_headers = self._route_api(method, route[len("/api"):], payload, parts.query, headers)
+        if method == "GET" and status == 200:
+            etag = '"' + hashlib.md5(json.dumps(body, sort_keys=True).encode()).hexdigest() + '"'
+            response_headers["ETag"] = etag
+            if headers.get("If-None-Match") == etag:
+                return 304, b"", response_headers
+        return status, body, response_headers
+
+    def _route_api(
+        self, method: str, route: str, payload: Any, query: str = "", request_headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, Any, Dict[str, str]]:
+        headers = self._rate_headers()
+        if self._limited_status:
+            return self._limited_status, {"message": "API rate limit exceeded"}, headers
+        match = re.match(r"^/repos/([^/]+/[^/]+)/(.*)$", route)
+        if not match:
+            return 404, {"message": "Not Found"}, headers
+        repo, rest = match.group(1), match.group(2)
+        files = self.repos.get(repo, {})
+        if rest.startswith("contents/"):
+            path = rest[len("contents/"):].rstrip("/")
+            if method == "PUT":
+                files[path] = base64.b64decode(payload["content"]).decode()
+                return 200, {"content": {"path": path}}, headers
+            if path in files:
+                text = files[path]
+                return 200, {
+                    "type": "file",
+                    "name": path.rsplit("/", 1)[-1],
+                    "path": path,
+                    "sha": f"sha-{abs(hash(text)):x}",
+                    "content": base64.b64encode(text.encode()).decode(),
+                }, headers
+            children: Dict[str, str] = {}
+            prefix = path + "/"
+            for file_path in files:
+                if file_path.startswith(prefix):
+                    head, _, tail = file_path[len(prefix):].partition("/")
+                    children[head] = "dir" if tail else "file"
+            if not children:
+                return 404, {"message": "Not Found"}, headers
+            return 200, [
+                {"name": name, "path": prefix + name, "type": kind} for name, kind in sorted(children.items())
+            ], headers
+        if rest.startswith("commits/") and repo == CLIF_REPO:
+            ref = rest[len("commits/"):]
+            sha = self.refs.get(ref) or ("0" * 40 if ref == "main" else ref if ref in self.commits else None)
+            if sha is None:
+                return 422, {"message": f"No commit found for SHA: {ref}"}, headers
+            if "sha" in (request_headers or {}).get("Accept", ""):
+                return 200, sha, dict(headers, **{"Content-Type": "application/vnd.github.sha"})
+            return 200, {"sha": sha}, headers
+        if rest.startswith("git/trees/") and repo == CLIF_REPO:
+            return self._tree(rest[len("git/trees/"):], "recursive=1" in query, headers)
+        if rest == "git/ref/heads/main":
+            return 200, {"ref": "refs/heads/main", "object": {"sha": "0" * 40}}, headers
+        if rest == "git/refs" and method == "POST":
+            return 201, {"ref": payload["ref"], "object": {"sha": payload["sha"]}}, headers
+        if rest == "pulls" and method == "POST":
+            return 201, {"html_url": f"https://github.com/{repo}/pull/1", "number": 1}, headers
+        if rest == "issues" and method == "POST":
+            return 201, self.add_issue(payload["title"], payload.get("body") or "", updated_at="2099-01-01T00:00:00Z"), headers
+        if rest == "issues" and method == "GET":
+            return self._list_issues(repo, parse_qs(query), headers)
+        return 404, {"message": "Not Found"}, headers
+
+    def _list_issues(self, repo: str, query: Dict[str, List[str]], headers: Dict[str, str]) -> Tuple[int, Any, Dict[str, str]]:
+        since = query.get("since", [""])[0]
+        per_page = int(query.get("per_page", ["30"])[0])
+        page = int(query.get("page", ["1"])[0])
+        matching = sorted(
+            (issue for issue in self.issues if issue["updated_at"] >= since), key=lambda issue: issue["updated_at"]
+        )
+        body = matching[(page - 1) * per_page:page * per_page]
+        if page * per_page < len(matching):
+            params = {key: values[0] for key, values in query.items()}
+            params["page"] = str(page + 1)
+            headers = dict(headers, Link=f'<{self.url}/api/repos/{repo}/issues?{urlencode(params)}>; rel="next"')
+        return 200, body, headers
+
+    def _tree(self, tree_sha: str, recursive: bool, headers: Dict[str, str]) -> Tuple[int, Any, Dict[str, str]]:
+        # Tree SHAs are "<commit sha>:<directory>" so they can be listed lazily.
+        commit, _, directory = tree_sha.partition(":")
+        files = self.repos[CLIF_REPO] if commit == "0" * 40 else self.commits.get(commit)
+        if files is None:
+            return 404, {"message": "Not Found"}, headers
+        prefix = directory + "/" if directory else ""
+        entries: Dict[str, str] = {}
+        for path in files:
+            if not path.startswith(prefix):
+                continue
+            parts = path[len(prefix):].split("/")
+            for depth in range(1, len(parts) + 1 if recursive else 2):
+                entries["/".join(parts[:depth])] = "blob" if depth == len(parts) else "tree"
+        tree = [
+            {"path": path, "type": kind, "sha": f"{commit}:{prefix}{path}" if kind == "tree" else f"blob-{path}"}
+            for path, kind in sorted(entries.items())
+        ]
+        return 200, {"sha": tree_sha, "tree": tree, "truncated": False}, headers
+
+
+class FakeSlackClient:
+    """Records Slack Web API calls made by the listeners."""
+
+    def __init__(self) -> None:
+        self.calls: List[Tuple[str, Dict[str, Any]]] = []
+        self._views = 0
+
+    def _record(self, method: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls.append((method, kwargs))
+        return {"ok": True}
+
+    def views_open(self, **kwargs: Any) -> Dict[str, Any]:
+        self._record("views.open", kwargs)
+        self._views += 1
+        view = dict(kwargs["view"], id=f"V{self._views:08d}", hash=f"h{self._views}")
+        return {"ok": True, "view": view}
+
+    def views_update(self, **kwargs: Any) -> Dict[str, Any]:
+        self._record("views.update", kwargs)
+        return {"ok": True, "view": kwargs["view"]}
+
+    def chat_postMessage(self, **kwargs: Any) -> Dict[str, Any]:
+        self._record("chat.postMessage", kwargs)
+        return {"ok": True, "channel": kwargs.get("channel"), "ts": "1.0"}
+
+    def users_info(self, **kwargs: Any) -> Dict[str, Any]:
+        self._record("users.info", kwargs)
+        user = kwargs.get("user", "U0")
+        return {"ok": True, "user": {"id": user, "name": user.lower(), "real_name": f"User {user}"}}
+
+    def last(self, method: str) -> Dict[str, Any]:
+        for name, kwargs in reversed(self.calls):
+            if name == method:
+                return kwargs
+        raise LookupError(method)
+
+
+class FakeSlackAPI:
+    """Slack Web API and ``response_url`` endpoints served on ``127.0.0.1``.
+
+    Bolt creates a new ``WebClient`` for every request from ``app.client``'s
+    settings, so the app is stubbed at the HTTP level: export
+    ``SLACK_API_URL`` (see :meth:`env`) before importing ``app``.
+    ``latency`` adds a delay to every call to mimic the real API.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._views = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> "FakeSlackAPI":
+        self._server = serve(self.route)
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def url(self) -> str:
+        return _server_url(self._server)
+
+    @property
+    def response_url(self) -> str:
+        return f"{self.url}/response"
+
+    def env(self) -> Dict[str, str]:
+        return {"SLACK_API_URL": f"{self.url}/api/"}
+
+    def route(self, method: str, path: str, body: bytes, headers: Dict[str, str]) -> Tuple[int, Any, Dict[str, str]]:
+        if self.latency:
+            time.sleep(self.latency)
+        route = urlsplit(path).path
+        if headers.get("Content-Type", "").startswith("application/json"):
+            payload = json.loads(body or b"{}")
+        else:
+            payload = {k: v[0] for k, v in parse_qs(body.decode()).items()}
+        name = "response_url" if route.startswith("/response") else route.rsplit("/", 1)[-1]
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self._views += name == "views.open"
+            view_number = self._views
+        json_headers = {"Content-Type": "application/json"}
+        if name == "response_url":
+            return 200, "ok", {"Content-Type": "text/plain"}
+        if name == "auth.test":
+            return 200, {"ok": True, "url": "https://clif.slack.com/", "team": "CLIF", "user": "clif-bot",
+                         "team_id": "T0001", "user_id": "UBOT", "bot_id": "BBOT"}, json_headers
+        if name == "views.open":
+            view = dict(payload.get("view") or {}, id=f"V{view_number:08d}", hash=f"h{view_number}")
+            return 200, {"ok": True, "view": view}, json_headers
+        if name == "views.update":
+            return 200, {"ok": True, "view": payload.get("view") or {}}, json_headers
+        if name == "chat.postMessage":
+            return 200, {"ok": True, "channel": payload.get("channel"), "ts": f"{time.time():.6f}"}, json_headers
+        if name == "users.info":
+            user = payload.get("user", "U0")
+            return 200, {"ok": True, "user": {"id": user, "name": user.lower(), "real_name": f"User {user}"}}, json_headers
+        return 200, {"ok": True}, json_headers
+
+
+def noop(*args: Any, **kwargs: Any) -> None:
+    """Stand-in for Bolt's ``ack`` and ``respond``."""
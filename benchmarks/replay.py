@@ -0,0 +1,410 @@
+"""Replay recorded Slack payloads against the Bolt app under load.
+
+Record real traffic by running the bot with ``CLIF_RECORD_FILE`` set (see
+:mod:`clif_bot.recording`), or write a synthetic recording together with
+the data file it expects::
+
+    python -m benchmarks.replay synth --out load.jsonl --data load_data.json
+    python -m benchmarks.replay replay load.jsonl --data load_data.json \\
+        --concurrency 16 --rate 200 --output replay.json
+
+``replay`` copies the data file into a scratch directory and points the
+app at :class:`~benchmarks.fakes.FakeGitHub` and
+:class:`~benchmarks.fakes.FakeSlackAPI`.  It then dispatches each payload
+through ``app.dispatch`` as Socket Mode would, from ``--concurrency`` worker
+threads at ``--rate`` payloads per second (0 for as fast as possible).
+
+The report covers:
+
+- throughput;
+- ack latency percentiles, overall and per listener;
+- errors (non-200 responses, exceptions, failed listeners);
+- Slack and GitHub call counts;
+- whether the final ``StatusStore`` is consistent.
+
+Ack latency is measured from when a payload was due, so it includes
+queueing once the workers fall behind the rate.  Bolt polls for the ack
+every 10ms, so latencies are only accurate to about that much.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from benchmarks.fakes import FakeGitHub, FakeSlackAPI
+
+TEAM = {"id": "T0001", "domain": "clif"}
+
+
+# --- recordings -------------------------------------------------------------
+def load_recording(path: str) -> List[Dict[str, Any]]:
+    """The payload bodies in a ``CLIF_RECORD_FILE``, oldest first."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["body"] for line in f if line.strip()]
+
+
+def kind(body: Dict[str, Any]) -> str:
+    """The listener a payload is routed to: command, action_id or callback_id."""
+    if "command" in body:
+        return body["command"]
+    if body.get("type") == "block_actions":
+        return body["actions"][0]["action_id"]
+    if body.get("type") in ("view_submission", "view_closed"):
+        return body["view"]["callback_id"]
+    return body.get("type", "unknown")
+
+
+def _command(name: str, user_id: str, n: int, text: str = "") -> Dict[str, Any]:
+    return {
+        "team_id": TEAM["id"], "team_domain": TEAM["domain"], "channel_id": "C0001", "channel_name": "clif",
+        "user_id": user_id, "user_name": user_id.lower(), "command": name, "text": text,
+        "response_url": "https://hooks.slack.com/commands/replay", "trigger_id": f"trigger-{n}",
+    }
+
+
+def _action(action: Dict[str, Any], user_id: str, n: int, view: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    body: Dict[str, Any] = {
+        "type": "block_actions", "team": TEAM, "user": {"id": user_id, "team_id": TEAM["id"]},
+        "api_app_id": "A0001", "trigger_id": f"trigger-{n}", "actions": [action],
+    }
+    if view is None:
+        body["channel"] = {"id": "C0001"}
+        body["response_url"] = "https://hooks.slack.com/actions/replay"
+    else:
+        body["view"] = view
+    return body
+
+
+def synthesize(events: int = 2000, projects: int = 40, seed: int = 1) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """A data file and a recording of mixed POC traffic against it.
+
+    Every site has one POC.  Most payloads are ``status_update`` button
+    clicks, with ``/clif-my-projects`` submissions, mCIDE browsing and
+    ``/clif-status`` mixed in.  A project only moves to ✅/❌ late in the
+    recording, so most of the traffic hits active projects.
+    """
+    from clif_bot import views
+    from clif_bot.metadata import ProjectMetadata
+    from clif_bot.state import SITES, STATUS_EMOJI, ProjectStatus
+
+    rng = random.Random(seed)
+    repos = [f"https://github.com/replay-org/project-{i:03d}" for i in range(projects)]
+    pocs = {f"UPOC{i:02d}": site for i, site in enumerate(SITES)}
+    now = time.time()
+    data = {
+        "projects": {
+            repo: ProjectStatus(
+                ProjectMetadata(f"Replay project {i}", "Synthetic load", ["patient", "vitals"]),
+                released_at=now - 86400 * (i % 30),
+            ).to_dict()
+            for i, repo in enumerate(repos)
+        },
+        "pocs": pocs,
+        "poc_assignments": {site: {user_id: "General"} for user_id, site in pocs.items()},
+    }
+
+    tables = [f"table{t:02d}" for t in range(10)]
+    mcide_view = dict(views.render("mcide_modal", table_options=views.text_options(tables)), id="V0", hash="h0")
+    users = list(pocs)
+    recording = []
+    for n in range(events):
+        user_id = rng.choice(users)
+        late = n > events * 0.8
+        roll = rng.random()
+        if roll < 0.70:
+            status = rng.choice(STATUS_EMOJI if late else STATUS_EMOJI[:2])
+            repo = rng.choice(repos)
+            recording.append(_action(
+                {"type": "button", "action_id": "status_update", "block_id": "status", "value": f"{repo}|{status}"},
+                user_id, n,
+            ))
+        elif roll < 0.80:
+            chosen = rng.sample(repos, 5)
+            values = {
+                repo: {"status_select": {"type": "static_select", "selected_option": {
+                    "value": rng.choice(STATUS_EMOJI if late else STATUS_EMOJI[:2])}}}
+                for repo in chosen
+            }
+            view = dict(views.render("clif_my_projects_modal", site=pocs[user_id]), id=f"V{n}", hash=f"h{n}",
+                        state={"values": values})
+            recording.append({
+                "type": "view_submission", "team": TEAM, "user": {"id": user_id, "team_id": TEAM["id"]},
+                "api_app_id": "A0001", "trigger_id": f"trigger-{n}", "view": view,
+            })
+        elif roll < 0.88:
+            recording.append(_command("/mCIDE", user_id, n))
+        elif roll < 0.96:
+            table = rng.choice(tables)
+            view = dict(mcide_view, state={"values": {"table_block": {"mcide_table_select": {
+                "type": "static_select", "selected_option": {"value": table}}}}})
+            recording.append(_action(
+                {"type": "static_select", "action_id": "mcide_table_select", "block_id": "table_block",
+                 "selected_option": {"value": table}},
+                user_id, n, view,
+            ))
+        else:
+            recording.append(_command("/clif-status", user_id, n))
+    return data, recording
+
+
+# --- replay -----------------------------------------------------------------
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p90/p99/max of ``samples`` (seconds) in milliseconds."""
+    if not samples:
+        return {"count": 0}
+    samples = sorted(samples)
+
+    def pick(q: float) -> float:
+        return samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+
+    return {"count": len(samples), "p50_ms": pick(0.50), "p90_ms": pick(0.90),
+            "p99_ms": pick(0.99), "max_ms": samples[-1] * 1000}
+
+
+def issued_statuses(bodies: List[Dict[str, Any]], pocs: Dict[str, str]) -> Dict[Tuple[str, str], Set[str]]:
+    """``{(repo_url, site): statuses}`` that the recording asks for."""
+    issued: Dict[Tuple[str, str], Set[str]] = {}
+    for body in bodies:
+        site = pocs.get((body.get("user") or {}).get("id"))
+        if site is None:
+            continue
+        name = kind(body)
+        if name == "status_update":
+            repo, status = body["actions"][0]["value"].split("|")
+            issued.setdefault((repo, site), set()).add(status)
+        elif name == "clif_my_projects_modal" and body["view"].get("private_metadata") == site:
+            for repo, block in body["view"]["state"]["values"].items():
+                selected = (block.get("status_select") or {}).get("selected_option")
+                if selected:
+                    issued.setdefault((repo, site), set()).add(selected["value"])
+    return issued
+
+
+def check_consistency(store, seed: Dict[str, Any], issued: Dict[Tuple[str, str], Set[str]]) -> List[str]:
+    """Problems with ``store`` after a replay; empty if it is consistent.
+
+    - The data file and snapshot on disk match memory.
+    - The rollups, in memory and on disk, match a rebuild from the event log.
+    - No project is both active and archived, and none went missing.
+    - Every status is the seeded one or one the recording asked for.
+    """
+    from clif_bot.state import SITES, StatusStore
+
+    problems = []
+    projects = {url: p.to_dict() for url, p in store.projects.items()}
+    for source, use_snapshot in (("data file", False), ("snapshot", True)):
+        reloaded = StatusStore(store.data_file, use_snapshot=use_snapshot)
+        if use_snapshot and not reloaded.loaded_from_snapshot:
+            problems.append("snapshot is missing or stale")
+        elif {url: p.to_dict() for url, p in reloaded.projects.items()} != projects or reloaded.pocs != store.pocs:
+            problems.append(f"{source} does not match the in-memory store")
+    rebuilt = store.events.rebuild().to_dict()
+    if store.events.rollups.to_dict() != rebuilt:
+        problems.append("status rollups do not match the event log")
+    if reloaded.events.rollups.to_dict() != rebuilt:
+        problems.append("saved status rollups do not match the event log")
+
+    archived: Dict[str, Any] = {}
+    page = 1
+    while True:
+        records, has_more = store.archived_projects(page, per_page=100)
+        for repo_url, _, project in records:
+            if repo_url in archived:
+                problems.append(f"{repo_url} archived twice")
+            archived[repo_url] = project
+        if not has_more:
+            break
+        page += 1
+    for repo_url in set(archived) & set(store.projects):
+        problems.append(f"{repo_url} is both active and archived")
+    for repo_url in set(seed["projects"]) - set(archived) - set(store.projects):
+        problems.append(f"{repo_url} went missing")
+    for repo_url, project in {**archived, **store.projects}.items():
+        if repo_url in archived and not project.finished:
+            problems.append(f"{repo_url} was archived unfinished")
+        seeded = seed["projects"].get(repo_url, {}).get("site_status", {})
+        for site in SITES:
+            allowed = issued.get((repo_url, site), set()) | {seeded.get(site, "❓")}
+            if project.get_status(site) not in allowed:
+                problems.append(f"{repo_url} {site}: {project.get_status(site)} was never requested")
+    return problems
+
+
+def replay(
+    bodies: List[Dict[str, Any]],
+    seed: Dict[str, Any],
+    concurrency: int = 8,
+    rate: float = 0.0,
+    slack_latency: float = 0.0,
+) -> Dict[str, Any]:
+    """Dispatch ``bodies`` to a fresh app loaded with ``seed`` and report on it.
+
+    ``app`` is imported here, after the environment points it at the fakes
+    and a scratch data file, so this can only run once per process.
+    """
+    github = FakeGitHub().start()
+    slack = FakeSlackAPI(latency=slack_latency).start()
+    workdir = tempfile.mkdtemp(prefix="clif-replay-")
+    data_file = os.path.join(workdir, "replay_data.json")
+    with open(data_file, "w", encoding="utf-8") as f:
+        json.dump(seed, f)
+    os.environ.update(github.env())
+    os.environ.update(slack.env())
+    os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-replay")
+    os.environ.setdefault("SLACK_SIGNING_SECRET", "replay")
+    os.environ["SLACK_VERIFY_TOKEN"] = "0"
+    os.environ["GITHUB_TOKEN"] = "replay-token"
+    os.environ["CLIF_BOT_DATA_FILE"] = data_file
+    os.environ["CLIF_ISSUE_INDEX_FILE"] = os.path.join(workdir, "issues.json")
+    os.environ["CLIF_MCIDE_CACHE_DIR"] = os.path.join(workdir, "mcide")
+    os.environ.pop("CLIF_RECORD_FILE", None)
+
+    try:
+        import app as bot
+        from slack_bolt.request import BoltRequest
+        from clif_bot import metrics
+
+        # Responses must not leave the machine.
+        for body in bodies:
+            if "response_url" in body:
+                body["response_url"] = slack.response_url
+        kinds = [kind(body) for body in bodies]
+        errors_before = {name: metrics.LISTENER_ERRORS.get(listener=name) for name in set(kinds)}
+        github_before = len(github.requests)
+
+        latencies: List[Optional[float]] = [None] * len(bodies)
+        failures: List[str] = []
+        positions = iter(range(len(bodies)))
+        lock = threading.Lock()
+        start = time.perf_counter()
+
+        def worker() -> None:
+            while True:
+                with lock:
+                    n = next(positions, None)
+                if n is None:
+                    return
+                due = start + n / rate if rate else time.perf_counter()
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                try:
+                    response = bot.app.dispatch(BoltRequest(body=bodies[n], mode="socket_mode"))
+                    if response.status != 200:
+                        failures.append(f"{kinds[n]}: HTTP {response.status}")
+                except Exception as e:
+                    failures.append(f"{kinds[n]}: {e!r}")
+                latencies[n] = time.perf_counter() - due
+
+        threads = [threading.Thread(target=worker, name=f"replay-{i}") for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        acked = time.perf_counter() - start
+        # dispatch returns at ack; wait for the listeners to finish.
+        bot.app.listener_runner.listener_executor.shutdown(wait=True)
+        elapsed = time.perf_counter() - start
+
+        by_kind: Dict[str, List[float]] = {}
+        for name, latency in zip(kinds, latencies):
+            if latency is not None:
+                by_kind.setdefault(name, []).append(latency)
+        listener_errors = {
+            name: int(metrics.LISTENER_ERRORS.get(listener=name) - errors_before[name]) for name in errors_before
+        }
+        problems = check_consistency(bot.store, seed, issued_statuses(bodies, seed.get("pocs", {})))
+        return {
+            "payloads": len(bodies),
+            "concurrency": concurrency,
+            "rate": rate,
+            "acked_seconds": acked,
+            "elapsed_seconds": elapsed,
+            "throughput_per_second": len(bodies) / elapsed if elapsed else 0.0,
+            "ack_latency": percentiles([x for x in latencies if x is not None]),
+            "ack_latency_by_listener": {name: percentiles(samples) for name, samples in sorted(by_kind.items())},
+            "errors": {
+                "dispatch": failures,
+                "listeners": {name: count for name, count in listener_errors.items() if count},
+            },
+            "slack_calls": dict(sorted(slack.calls.items())),
+            "github_requests": len(github.requests) - github_before,
+            "consistency": {"ok": not problems, "problems": problems[:50]},
+        }
+    finally:
+        slack.stop()
+        github.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def summary(report: Dict[str, Any]) -> Iterator[str]:
+    latency = report["ack_latency"]
+    yield (f"{report['payloads']} payloads in {report['elapsed_seconds']:.2f}s "
+           f"({report['throughput_per_second']:.0f}/s, concurrency {report['concurrency']})")
+    if latency["count"]:
+        yield (f"ack latency p50 {latency['p50_ms']:.1f} ms  p90 {latency['p90_ms']:.1f} ms  "
+               f"p99 {latency['p99_ms']:.1f} ms  max {latency['max_ms']:.1f} ms")
+    for name, stats in report["ack_latency_by_listener"].items():
+        yield f"  {name:28s} n={stats['count']:<6d} p50 {stats['p50_ms']:7.1f} ms  p99 {stats['p99_ms']:7.1f} ms"
+    errors = report["errors"]
+    yield f"errors: {len(errors['dispatch'])} dispatch, {sum(errors['listeners'].values())} listener"
+    for name, count in errors["listeners"].items():
+        yield f"  {name}: {count}"
+    yield "slack calls: " + ", ".join(f"{k}={v}" for k, v in report["slack_calls"].items())
+    yield f"github requests: {report['github_requests']}"
+    consistency = report["consistency"]
+    yield "store consistent" if consistency["ok"] else f"store INCONSISTENT ({len(consistency['problems'])} problems)"
+    for problem in consistency["problems"][:10]:
+        yield f"  {problem}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="mode", required=True)
+
+    synth = commands.add_parser("synth", help="write a synthetic recording and its data file")
+    synth.add_argument("--out", required=True, help="recording to write (JSON lines)")
+    synth.add_argument("--data", required=True, help="data file to write")
+    synth.add_argument("--events", type=int, default=2000)
+    synth.add_argument("--projects", type=int, default=40)
+    synth.add_argument("--seed", type=int, default=1)
+
+    run = commands.add_parser("replay", help="replay a recording against the app")
+    run.add_argument("recording", help="a CLIF_RECORD_FILE or synthetic recording")
+    run.add_argument("--data", required=True, help="data file to start from (it is copied, not modified)")
+    run.add_argument("--concurrency", type=int, default=8, help="dispatching threads")
+    run.add_argument("--rate", type=float, default=0.0, help="payloads per second (0: as fast as possible)")
+    run.add_argument("--slack-latency", type=float, default=0.0, help="seconds added to each fake Slack call")
+    run.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    if args.mode == "synth":
+        data, recording = synthesize(args.events, args.projects, args.seed)
+        with open(args.data, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        with open(args.out, "w", encoding="utf-8") as f:
+            for body in recording:
+                f.write(json.dumps({"ts": 0, "body": body}, ensure_ascii=False) + "\n")
+        print(f"Wrote {len(recording)} payloads to {args.out} and {len(data['projects'])} projects to {args.data}")
+        return 0
+
+    with open(args.data, encoding="utf-8") as f:
+        seed = json.load(f)
+    report = replay(load_recording(args.recording), seed, args.concurrency, args.rate, args.slack_latency)
+    print("\n".join(summary(report)))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if report["consistency"]["ok"] and not report["errors"]["dispatch"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
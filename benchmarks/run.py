@@ -0,0 +1,247 @@
+"""Benchmark the Slack handlers, ``StatusStore`` and GitHub helpers.
+
+Everything runs against :mod:`benchmarks.fakes`, so no network access or
+Slack workspace is needed::
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --output new.json --compare bench.json
+
+Results are written as JSON (one entry per benchmark with timings in
+milliseconds) so runs from different commits can be compared.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.fakes import CLIF_REPO, FakeGitHub, FakeSlackClient, noop
+
+STORE_SIZES = (10, 100, 1000)
+
+
+def measure(fn: Callable[[], Any], rounds: int, warmup: int = 1) -> Dict[str, float]:
+    """Run ``fn`` ``rounds`` times and summarise wall-clock timings in ms."""
+    for _ in range(warmup):
+        fn()
+    samples: List[float] = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "rounds": rounds,
+        "min_ms": samples[0],
+        "median_ms": statistics.median(samples),
+        "mean_ms": statistics.fmean(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "max_ms": samples[-1],
+        "stdev_ms": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def bench_github(fake: FakeGitHub, rounds: int) -> Dict[str, Dict[str, float]]:
+    from clif_bot import mcide
+    from clif_bot.metadata import parse_repo
+
+    results = {}
+    repos = {
+        kind: fake.add_project(f"bench-org/{kind}-project", kind)
+        for kind in ("yaml", "json", "readme")
+    }
+    repos["readme-large"] = fake.add_project("bench-org/large-readme-project", "readme", readme_lines=50_000)
+    for kind, url in repos.items():
+        results[f"parse_repo[{kind}]"] = measure(lambda url=url: parse_repo(url), rounds)
+
+    fake.tag("bench-v1")
+    fake.add_file(CLIF_REPO, "mCIDE/table00/clif_table00_var0_category_categories.csv", "category\nbench_new\n")
+    fake.tag("bench-v2")
+    mcide.CATALOG_DIR = tempfile.mkdtemp(prefix="clif-mcide-")
+    results["mcide.fetch_catalog[cold]"] = measure(
+        lambda: (mcide._catalogs.clear(), shutil.rmtree(mcide.CATALOG_DIR, ignore_errors=True),
+                 mcide.fetch_catalog("bench-v1")), rounds
+    )
+    results["mcide.diff[cached]"] = measure(lambda: mcide.diff("bench-v1", "bench-v2"), rounds)
+
+    counter = iter(range(10**9))
+    results["update_category_csv"] = measure(
+        lambda: mcide.update_category_csv("table00", "var0_category", f"bench_{next(counter)}"), rounds
+    )
+    return results
+
+
+def bench_handlers(rounds: int) -> Dict[str, Dict[str, float]]:
+    import app as bot
+
+    results = {}
+    client = FakeSlackClient()
+    command = {"trigger_id": "T123", "user_id": "U1", "text": ""}
+    results["handler.mcide_open"] = measure(
+        lambda: bot.handle_mcide(ack=noop, respond=noop, command=command, client=client), rounds
+    )
+
+    opened = client.last("views.open")["view"]
+    view = dict(opened, id="V1", hash="h1")
+    view["state"] = {
+        "values": {"table_block": {"mcide_table_select": {"selected_option": {"value": "table01"}}}}
+    }
+    table_body = {
+        "actions": [{"selected_option": {"value": "table01"}}],
+        "view": view,
+        "user": {"id": "U1"},
+    }
+    results["handler.mcide_table_changed"] = measure(
+        lambda: bot.mcide_table_changed(ack=noop, body=table_body, client=client), rounds
+    )
+    variable_body = dict(table_body, actions=[{"selected_option": {"value": "var1_category"}}])
+    results["handler.mcide_variable_changed"] = measure(
+        lambda: bot.mcide_variable_changed(ack=noop, body=variable_body, client=client), rounds
+    )
+    words = ["vitals", "labs", "units", "missing", "sepsis", "ventilator", "mode", "dose", "heparin", "lactate",
+             "patient", "table", "category", "rename", "outlier", "timestamp", "timezone", "admission", "discharge"]
+    for i in range(2000):
+        title = " ".join(words[(i * k) % len(words)] for k in (1, 3, 7, 11)) + f" case {i}"
+        bot.issue_index.upsert({"number": i + 1, "title": title, "body": title * 3, "updated_at": str(i)})
+    typed_body = {
+        "actions": [{"value": "Ventilator mode units missing in vit"}],
+        "view": dict(bot.views.issue_view(), id="V2", hash="h2"),
+        "user": {"id": "U1"},
+    }
+    results["issues.search[2000]"] = measure(lambda: bot.issue_index.search("ventilator mode units missing in vit"), rounds)
+    results["handler.issue_title_typed"] = measure(
+        lambda: bot.handle_issue_title_typed(ack=noop, body=typed_body, client=client), rounds
+    )
+    for name, handler in (
+        ("handler.clif_run_open", bot.handle_clif_run),
+        ("handler.clif_issues_open", bot.handle_clif_issues),
+        ("handler.clif_site_poc_open", bot.handle_clif_site_poc),
+        ("handler.clif_help_open", bot.handle_clif_help),
+    ):
+        results[name] = measure(
+            lambda handler=handler: handler(ack=noop, respond=noop, command=command, client=client), rounds
+        )
+    return results
+
+
+def bench_store(rounds: int, workdir: str) -> Dict[str, Dict[str, float]]:
+    from clif_bot.metadata import ProjectMetadata
+    from clif_bot.state import SITES, ProjectStatus, StatusStore
+
+    results = {}
+    for size in STORE_SIZES:
+        path = os.path.join(workdir, f"store_{size}.json")
+        store = StatusStore(path)
+        for i in range(size):
+            repo = f"https://github.com/bench-org/project-{i}"
+            store.projects[repo] = ProjectStatus(
+                ProjectMetadata(f"Benchmark project {i}", "desc", ["patient", "labs"])
+            )
+        store.save_data()
+        repos = list(store.projects)
+        sites = iter(range(10**9))
+
+        def mutate() -> None:
+            n = next(sites)
+            store.set_site_status(repos[n % len(repos)], SITES[n % len(SITES)], "🛠")
+
+        results[f"store.set_site_status[{size}]"] = measure(mutate, rounds)
+        results[f"store.save_data[{size}]"] = measure(store.save_data, rounds)
+        results[f"store.load_json[{size}]"] = measure(lambda: StatusStore(path, use_snapshot=False), rounds)
+        results[f"store.load_snapshot[{size}]"] = measure(lambda: StatusStore(path), rounds)
+        results[f"store.status_table[{size}]"] = measure(store.status_table, rounds)
+    return results
+
+
+def bench_startup(rounds: int) -> Dict[str, Dict[str, float]]:
+    """Time a fresh interpreter importing ``app`` (module-level App and StatusStore)."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    cmd = [sys.executable, "-c", "import app"]
+    run = lambda: subprocess.run(cmd, cwd=root, env=os.environ.copy(), check=True)
+    return {"startup.import_app": measure(run, max(3, rounds // 4))}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Return human-readable median deltas between two result files."""
+    lines = []
+    for name, stats in current["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            lines.append(f"{name:45s} {stats['median_ms']:10.3f} ms   (new)")
+            continue
+        delta = (stats["median_ms"] - old["median_ms"]) / old["median_ms"] * 100 if old["median_ms"] else 0.0
+        lines.append(f"{name:45s} {stats['median_ms']:10.3f} ms   {delta:+7.1f}%")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20, help="timed iterations per benchmark")
+    parser.add_argument("--output", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", help="previous JSON results to diff medians against")
+    args = parser.parse_args(argv)
+
+    fake = FakeGitHub().start()
+    workdir = tempfile.mkdtemp(prefix="clif-bench-")
+    # The bot reads these at import time, so they must be set before any
+    # clif_bot or app import below.
+    os.environ.update(fake.env())
+    os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-benchmark")
+    os.environ.setdefault("SLACK_SIGNING_SECRET", "benchmark")
+    os.environ["SLACK_VERIFY_TOKEN"] = "0"
+    os.environ["GITHUB_TOKEN"] = "benchmark-token"
+    os.environ["CLIF_BOT_DATA_FILE"] = os.path.join(workdir, "app_data.json")
+
+    try:
+        results: Dict[str, Dict[str, float]] = {}
+        results.update(bench_github(fake, args.rounds))
+        results.update(bench_handlers(args.rounds))
+        results.update(bench_store(args.rounds, workdir))
+        results.update(bench_startup(args.rounds))
+    finally:
+        fake.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "rounds": args.rounds,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print("\n".join(compare(report, baseline)), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
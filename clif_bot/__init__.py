@@ -0,0 +1,4 @@
+# The main CLIF repository (mCIDE catalogs, issues).  Defined here rather than
+# in clif_bot.github so the benchmark fakes can import it before the GitHub
+# URLs are read from the environment.
+CLIF_REPO = "Common-Longitudinal-ICU-data-Format/CLIF"
@@ -0,0 +1,55 @@
+"""Compressed, append-only archive of finished projects.
+
+Each archived project is one JSON line.  Every :meth:`ProjectArchive.append`
+call writes a new gzip member to the end of the file, so existing data is
+never rewritten, and readers stream the file one line at a time.  The
+archive is only opened when it is queried.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+
+class ProjectArchive:
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def append(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Append ``records`` (``{"repo_url", "archived_at", "metadata", ...}``)."""
+        lines = [json.dumps(record, ensure_ascii=False) + "\n" for record in records]
+        if not lines:
+            return 0
+        with open(self.path, "ab") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            f.write("".join(lines).encode("utf-8"))
+        return len(lines)
+
+    def _lines(self) -> Iterator[bytes]:
+        if not os.path.exists(self.path):
+            return
+        with gzip.open(self.path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield line
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for line in self._lines():
+            yield json.loads(line)
+
+    def page(self, page: int = 1, per_page: int = 20) -> Tuple[List[Dict[str, Any]], bool]:
+        """Return one page of records (oldest first) and whether more follow.
+
+        Lines before the page are skipped without being decoded, so memory
+        use is bounded by ``per_page`` no matter how large the archive is.
+        """
+        start = max(0, page - 1) * per_page
+        records: List[Dict[str, Any]] = []
+        for index, line in enumerate(self._lines()):
+            if index < start:
+                continue
+            if len(records) == per_page:
+                return records, True
+            records.append(json.loads(line))
+        return records, False
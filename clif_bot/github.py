@@ -0,0 +1,267 @@
+"""Shared GitHub endpoints and HTTP helpers used by the bot.
+
+The base URLs can be overridden through the environment so the bot can be
+pointed at a GitHub Enterprise instance or a local stand-in server.  All
+outbound GitHub traffic goes through :func:`request` so latency, status
+codes and rate-limit headers are recorded in :mod:`clif_bot.metrics` and
+each call gets a client span in :mod:`clif_bot.tracing`.
+
+API calls are authenticated with ``GITHUB_TOKEN`` when it is set and are
+checked against :data:`BUDGET`, which tracks the ``X-RateLimit-*`` headers.
+Once the remaining budget falls to the write reserve, reads are refused
+(and :func:`get_json` serves its cached copy) so that PRs and issues can
+still be created.
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from . import metrics, tracing
+
+if TYPE_CHECKING:
+    import requests
+
+API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+RAW_URL = os.environ.get("GITHUB_RAW_URL", "https://raw.githubusercontent.com").rstrip("/")
+
+_session: Optional["requests.Session"] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> "requests.Session":
+    """Return the shared session, importing ``requests`` on first use.
+
+    ``requests`` (and certifi) are a noticeable share of start-up time and
+    aren't needed to connect to Slack, so they load with the first call.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+
+                _session = requests.Session()
+    return _session
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised instead of sending a request the rate-limit budget can't afford."""
+
+
+@dataclass
+class RateLimit:
+    limit: int
+    remaining: int
+    reset: float  # epoch seconds
+    updated: float
+
+
+class RateLimitBudget:
+    """Track GitHub rate limits per resource and ration them by priority.
+
+    Writes (PRs, issues) may use the whole remaining budget; reads stop once
+    ``remaining`` drops to the reserve so they can't starve writes.  The
+    reserve defaults to 10% of the limit (at least 5 calls) and can be set
+    with ``GITHUB_WRITE_RESERVE``.
+    """
+
+    def __init__(self, reserve: Optional[int] = None) -> None:
+        if reserve is None and os.environ.get("GITHUB_WRITE_RESERVE"):
+            reserve = int(os.environ["GITHUB_WRITE_RESERVE"])
+        self.reserve = reserve
+        self.limits: Dict[str, RateLimit] = {}
+        self._lock = threading.Lock()
+
+    def update(self, headers, now: Optional[float] = None) -> None:
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        resource = headers.get("X-RateLimit-Resource", "core")
+        now = time.time() if now is None else now
+        with self._lock:
+            self.limits[resource] = RateLimit(
+                limit=int(headers.get("X-RateLimit-Limit", remaining)),
+                remaining=int(remaining),
+                reset=float(headers.get("X-RateLimit-Reset", now)),
+                updated=now,
+            )
+        metrics.GITHUB_RATE_REMAINING.set(float(remaining), resource=resource)
+
+    def reserve_for(self, resource: str) -> int:
+        if self.reserve is not None:
+            return self.reserve
+        state = self.limits.get(resource)
+        return max(5, state.limit // 10) if state else 5
+
+    def allow(self, priority: str, resource: str = "core", now: Optional[float] = None) -> bool:
+        """Return whether a call of ``priority`` ("read"/"write") may be sent now."""
+        with self._lock:
+            state = self.limits.get(resource)
+            if state is None:
+                return True
+            now = time.time() if now is None else now
+            if now >= state.reset:
+                return True
+            if priority == "write":
+                return state.remaining > 0
+            return state.remaining > self.reserve_for(resource)
+
+    def consume(self, resource: str = "core") -> None:
+        """Optimistically count a call before its response headers arrive."""
+        with self._lock:
+            state = self.limits.get(resource)
+            if state is not None and state.remaining > 0:
+                state.remaining -= 1
+
+    def summary(self, now: Optional[float] = None) -> str:
+        now = time.time() if now is None else now
+        if not self.limits:
+            return "No GitHub API calls made yet."
+        lines = []
+        for resource, state in sorted(self.limits.items()):
+            minutes = max(0, int((state.reset - now) // 60))
+            low = " (reads paused)" if not self.allow("read", resource, now) else ""
+            lines.append(
+                f"{resource}: {state.remaining}/{state.limit} remaining, "
+                f"resets in {minutes} min, write reserve {self.reserve_for(resource)}{low}"
+            )
+        return "\n".join(lines)
+
+
+BUDGET = RateLimitBudget()
+
+
+def auth_headers() -> Dict[str, str]:
+    token = os.environ.get("GITHUB_TOKEN")
+    return {"Authorization": f"token {token}"} if token else {}
+
+
+def _resource(url: str) -> str:
+    return "search" if urlsplit(url).path.startswith(urlsplit(API_URL).path + "/search") else "core"
+
+_REPO_PATH = re.compile(r"^/repos/[^/]+/[^/]+(?:/([^/]+)(?:/([^/]+))?)?")
+
+
+def endpoint_name(url: str) -> str:
+    """Collapse a GitHub URL into a low-cardinality endpoint label.
+
+    ``https://api.github.com/repos/o/r/contents/mCIDE/x`` becomes
+    ``/repos/:repo/contents`` and every raw file fetch becomes ``raw``.
+    """
+    if url.startswith(RAW_URL):
+        return "raw"
+    path = urlsplit(url).path
+    api_path = urlsplit(API_URL).path
+    if api_path and path.startswith(api_path):
+        path = path[len(api_path):]
+    match = _REPO_PATH.match(path)
+    if not match:
+        return path or "/"
+    section, sub = match.groups()
+    if section == "git" and sub:
+        return f"/repos/:repo/git/{sub}"
+    return f"/repos/:repo/{section}" if section else "/repos/:repo"
+
+
+def request(method: str, url: str, priority: Optional[str] = None, **kwargs) -> requests.Response:
+    """Send a request to GitHub and record its metrics and span.
+
+    ``priority`` defaults to "read" for GET and "write" otherwise; pass
+    "write" for the GETs that are part of a write flow.  Raises
+    :class:`RateLimitExceeded` when the budget does not allow the call.
+    """
+    endpoint = endpoint_name(url)
+    is_api = url.startswith(API_URL)
+    if is_api:
+        resource = _resource(url)
+        priority = priority or ("read" if method == "GET" else "write")
+        if not BUDGET.allow(priority, resource):
+            raise RateLimitExceeded(f"GitHub {resource} budget too low for {priority} {endpoint}")
+        BUDGET.consume(resource)
+        kwargs["headers"] = {**auth_headers(), **(kwargs.get("headers") or {})}
+    attributes = {"http.method": method, "http.url": url, "github.endpoint": endpoint}
+    with tracing.start_span(f"GitHub {method} {endpoint}", kind=tracing.KIND_CLIENT, **attributes) as span:
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = get_session().request(method, url, **kwargs)
+            status = str(response.status_code)
+            if span is not None:
+                span.set_attribute("http.status_code", response.status_code)
+            if is_api:
+                BUDGET.update(response.headers)
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.GITHUB_SECONDS.observe(elapsed, method=method, endpoint=endpoint)
+            metrics.GITHUB_RESPONSES.inc(method=method, endpoint=endpoint, status=status)
+            metrics.log_event("github", method=method, endpoint=endpoint, status=status, seconds=elapsed)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def put(url: str, **kwargs) -> requests.Response:
+    return request("PUT", url, **kwargs)
+
+
+_CACHE_SIZE = 512
+_cache: "OrderedDict[str, Tuple[Optional[str], Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cached(url: str) -> Optional[Tuple[Optional[str], Any]]:
+    with _cache_lock:
+        entry = _cache.get(url)
+        if entry is not None:
+            _cache.move_to_end(url)
+        return entry
+
+
+def get_json(url: str, **kwargs) -> Any:
+    """GET a JSON API resource, revalidating a cached copy with its ETag.
+
+    304 responses do not count against the rate limit.  When the read
+    budget is exhausted, the request fails or GitHub answers 403/429, the
+    last good payload is returned instead; without one the error is raised.
+    """
+    import requests
+
+    entry = _cached(url)
+    headers = dict(kwargs.pop("headers", None) or {})
+    if entry is not None and entry[0]:
+        headers["If-None-Match"] = entry[0]
+    try:
+        response = request("GET", url, headers=headers, **kwargs)
+    except (RateLimitExceeded, requests.ConnectionError, requests.Timeout):
+        if entry is None:
+            raise
+        metrics.record_cache("github", True)
+        return entry[1]
+    if entry is not None and (
+        response.status_code == 304
+        or (response.status_code in (403, 429) and not BUDGET.allow("read", _resource(url)))
+    ):
+        metrics.record_cache("github", True)
+        return entry[1]
+    response.raise_for_status()
+    data = response.json()
+    metrics.record_cache("github", False)
+    with _cache_lock:
+        _cache[url] = (response.headers.get("ETag"), data)
+        _cache.move_to_end(url)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return data
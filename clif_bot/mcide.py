@@ -1,28 +1,44 @@
 from __future__ import annotations
 
 import base64
+import gzip
+import json
 import os
-from typing import List
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
 
-import requests
+from . import CLIF_REPO, github, tracing
+from .github import API_URL, RAW_URL
 
-MCIDE_BASE = "https://api.github.com/repos/Common-Longitudinal-ICU-data-Format/CLIF/contents/mCIDE"
-RAW_BASE = "https://raw.githubusercontent.com/Common-Longitudinal-ICU-data-Format/CLIF/main/mCIDE"
-REPO = "Common-Longitudinal-ICU-data-Format/CLIF"
+MCIDE_BASE = f"{API_URL}/repos/{CLIF_REPO}/contents/mCIDE"
 
+def raw_base(ref: str = "main") -> str:
+    """Raw file base URL of the mCIDE directory at ``ref`` (branch, tag or SHA)."""
+    return f"{RAW_URL}/{CLIF_REPO}/{quote(ref, safe='')}/mCIDE"
+
+RAW_BASE = raw_base()
+_CSV_PATH = re.compile(r"^([^/]+)/clif_\1_(.+)_categories\.csv$")
+_SHA = re.compile(r"^[0-9a-f]{40}$")
+
+def _values(text: str) -> List[str]:
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+@tracing.traced("mcide.fetch_tables")
 def fetch_tables() -> List[str]:
     """Return the list of CLIF tables available in mCIDE."""
-    response = requests.get(MCIDE_BASE)
-    response.raise_for_status()
-    data = response.json()
+    data = github.get_json(MCIDE_BASE)
     return [item["name"] for item in data if item["type"] == "dir" and not item["name"].startswith("00_")]
 
+@tracing.traced("mcide.fetch_variables")
 def fetch_variables(table: str) -> List[str]:
     """Return the list of *_category variables for a given table."""
-    response = requests.get(f"{MCIDE_BASE}/{table}")
-    response.raise_for_status()
     variables = []
-    for item in response.json():
+    for item in github.get_json(f"{MCIDE_BASE}/{table}"):
         name = item["name"]
         if name.endswith("_categories.csv"):
             # file name pattern: clif_{table}_{var}_categories.csv
@@ -30,14 +46,16 @@ def fetch_variables(table: str) -> List[str]:
             variables.append(var)
     return variables
 
-def fetch_category_values(table: str, variable: str) -> List[str]:
-    """Return permissible values for a variable from its CSV."""
-    url = f"{RAW_BASE}/{table}/clif_{table}_{variable}_categories.csv"
-    response = requests.get(url)
+@tracing.traced("mcide.fetch_category_values")
+def fetch_category_values(table: str, variable: str, ref: str = "main") -> List[str]:
+    """Return permissible values for a variable from its CSV at ``ref``."""
+    url = f"{raw_base(ref)}/{table}/clif_{table}_{variable}_categories.csv"
+    response = github.get(url)
     if response.status_code != 200:
         return []
-    return [line.strip() for line in response.text.splitlines() if line.strip()]
+    return _values(response.text)
 
+@tracing.traced("mcide.update_category_csv")
 def update_category_csv(table: str, variable: str, new_value: str) -> str:
     """Append a new value to the variable's CSV and create a pull request.
 
@@ -49,12 +67,13 @@ def update_category_csv(table: str, variable: str, new_value: str) -> str:
     path = f"mCIDE/{table}/clif_{table}_{variable}_categories.csv"
     headers = {"Authorization": f"token {token}", "Accept": "application/vnd.github+json"}
 
-    # Get current file content
-    file_resp = requests.get(f"https://api.github.com/repos/{REPO}/contents/{path}", headers=headers)
+    # Get current file content.  These reads are part of a write, so they
+    # may dip into the budget reserved for writes.
+    file_resp = github.get(f"{API_URL}/repos/{CLIF_REPO}/contents/{path}", headers=headers, priority="write")
     file_resp.raise_for_status()
     file_data = file_resp.json()
     content = base64.b64decode(file_data["content"]).decode("utf-8")
-    lines = [line.strip() for line in content.splitlines() if line.strip()]
+    lines = _values(content)
     if new_value in lines:
         raise ValueError("Value already exists")
     lines.append(new_value)
@@ -62,19 +81,21 @@ def update_category_csv(table: str, variable: str, new_value: str) -> str:
     encoded = base64.b64encode(updated.encode()).decode()
 
     # Create branch
-    main_ref = requests.get(f"https://api.github.com/repos/{REPO}/git/ref/heads/main", headers=headers)
+    main_ref = github.get(
+        f"{API_URL}/repos/{CLIF_REPO}/git/ref/heads/main", headers=headers, priority="write"
+    )
     main_ref.raise_for_status()
     sha = main_ref.json()["object"]["sha"]
     branch_name = f"mcide-{table}-{variable}-{new_value}".replace(" ", "-")
-    requests.post(
-        f"https://api.github.com/repos/{REPO}/git/refs",
+    github.post(
+        f"{API_URL}/repos/{CLIF_REPO}/git/refs",
         headers=headers,
         json={"ref": f"refs/heads/{branch_name}", "sha": sha},
     ).raise_for_status()
 
     # Update file on new branch
-    requests.put(
-        f"https://api.github.com/repos/{REPO}/contents/{path}",
+    github.put(
+        f"{API_URL}/repos/{CLIF_REPO}/contents/{path}",
         headers=headers,
         json={
             "message": f"Add {new_value} to {variable}",
@@ -85,8 +106,8 @@ def update_category_csv(table: str, variable: str, new_value: str) -> str:
     ).raise_for_status()
 
     # Create pull request
-    pr_resp = requests.post(
-        f"https://api.github.com/repos/{REPO}/pulls",
+    pr_resp = github.post(
+        f"{API_URL}/repos/{CLIF_REPO}/pulls",
         headers=headers,
         json={
             "title": f"Add {new_value} to {table}.{variable}",
@@ -96,3 +117,182 @@ def update_category_csv(table: str, variable: str, new_value: str) -> str:
     )
     pr_resp.raise_for_status()
     return pr_resp.json().get("html_url", "")
+
+
+# --- Versioned catalogs -----------------------------------------------------
+# A catalog maps table -> variable -> permissible values.  Catalogs are keyed
+# by commit SHA, so once fetched they never change.  They are kept in memory
+# and gzipped in CATALOG_DIR, and a diff never touches the network for refs
+# already seen.
+Catalog = Dict[str, Dict[str, Tuple[str, ...]]]
+
+CATALOG_DIR = os.environ.get("CLIF_MCIDE_CACHE_DIR", "mcide_cache")
+CATALOG_FETCH_WORKERS = 8
+_catalogs: "OrderedDict[str, Catalog]" = OrderedDict()
+_catalogs_lock = threading.Lock()
+_MAX_CATALOGS = 16
+
+@dataclass(slots=True)
+class CategoryDiff:
+    table: str
+    variable: str
+    added: List[str]
+    removed: List[str]
+
+@tracing.traced("mcide.resolve_ref")
+def resolve_ref(ref: str) -> str:
+    """Resolve a branch, tag or (short) SHA to a full commit SHA."""
+    if _SHA.match(ref):
+        return ref
+    response = github.get(
+        f"{API_URL}/repos/{CLIF_REPO}/commits/{quote(ref, safe='')}",
+        headers={"Accept": "application/vnd.github.sha"},
+    )
+    if response.status_code in (404, 422):
+        raise ValueError(f"Unknown ref {ref!r}")
+    response.raise_for_status()
+    return response.text.strip()
+
+def _catalog_path(sha: str) -> str:
+    return os.path.join(CATALOG_DIR, f"{sha}.json.gz")
+
+def _load_catalog(sha: str) -> Optional[Catalog]:
+    path = _catalog_path(sha)
+    if not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        return {table: {var: tuple(values) for var, values in variables.items()} for table, variables in data.items()}
+    except Exception as e:
+        print(f"Error loading mCIDE catalog {sha}: {e}")
+        return None
+
+def _save_catalog(sha: str, catalog: Catalog) -> None:
+    try:
+        os.makedirs(CATALOG_DIR, exist_ok=True)
+        tmp = _catalog_path(sha) + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(catalog, f, ensure_ascii=False)
+        os.replace(tmp, _catalog_path(sha))
+    except Exception as e:
+        print(f"Error saving mCIDE catalog {sha}: {e}")
+
+def _remember(sha: str, catalog: Catalog) -> Catalog:
+    with _catalogs_lock:
+        _catalogs[sha] = catalog
+        _catalogs.move_to_end(sha)
+        while len(_catalogs) > _MAX_CATALOGS:
+            _catalogs.popitem(last=False)
+    return catalog
+
+def _tree(sha: str, recursive: bool = False) -> List[dict]:
+    url = f"{API_URL}/repos/{CLIF_REPO}/git/trees/{sha}" + ("?recursive=1" if recursive else "")
+    response = github.get(url)
+    response.raise_for_status()
+    data = response.json()
+    if data.get("truncated"):
+        raise RuntimeError(f"GitHub truncated the tree listing for {sha}")
+    return data["tree"]
+
+@tracing.traced("mcide.download_catalog")
+def _download_catalog(sha: str) -> Catalog:
+    """List the mCIDE CSVs at ``sha`` from the trees API and fetch them in parallel."""
+    mcide_tree = next(
+        (item["sha"] for item in _tree(sha) if item["path"] == "mCIDE" and item["type"] == "tree"), None
+    )
+    if mcide_tree is None:
+        return {}
+    files: List[Tuple[str, str, str]] = []
+    for item in _tree(mcide_tree, recursive=True):
+        match = _CSV_PATH.match(item["path"])
+        if item["type"] == "blob" and match and not match.group(1).startswith("00_"):
+            files.append((match.group(1), match.group(2), item["path"]))
+
+    base = raw_base(sha)
+
+    def fetch(path: str) -> List[str]:
+        response = github.get(f"{base}/{path}")
+        response.raise_for_status()
+        return _values(response.text)
+
+    with ThreadPoolExecutor(max_workers=CATALOG_FETCH_WORKERS) as pool:
+        # One propagate() per task: a captured context can't be entered twice at once.
+        futures = [pool.submit(tracing.propagate(fetch), path) for _, _, path in files]
+        results = [future.result() for future in futures]
+    catalog: Catalog = {}
+    for (table, variable, _), values in zip(files, results):
+        catalog.setdefault(table, {})[variable] = tuple(values)
+    return catalog
+
+def fetch_catalog(ref: str = "main") -> Tuple[str, Catalog]:
+    """Return ``(sha, catalog)`` for ``ref``, downloading it only once per SHA."""
+    sha = resolve_ref(ref)
+    with _catalogs_lock:
+        catalog = _catalogs.get(sha)
+    if catalog is None:
+        catalog = _load_catalog(sha)
+        if catalog is None:
+            catalog = _download_catalog(sha)
+            _save_catalog(sha, catalog)
+        _remember(sha, catalog)
+    return sha, catalog
+
+def diff_catalogs(old: Catalog, new: Catalog) -> List[CategoryDiff]:
+    """Added and removed values per table/variable, sorted by table and variable."""
+    diffs = []
+    empty: Dict[str, Tuple[str, ...]] = {}
+    for table in sorted(old.keys() | new.keys()):
+        old_vars, new_vars = old.get(table, empty), new.get(table, empty)
+        for variable in sorted(old_vars.keys() | new_vars.keys()):
+            before, after = old_vars.get(variable, ()), new_vars.get(variable, ())
+            if before == after:
+                continue
+            before_set, after_set = set(before), set(after)
+            added = [v for v in after if v not in before_set]
+            removed = [v for v in before if v not in after_set]
+            if added or removed:
+                diffs.append(CategoryDiff(table, variable, added, removed))
+    return diffs
+
+
+def diff(ref1: str, ref2: str) -> Tuple[str, str, List[CategoryDiff]]:
+    """Diff the catalogs at two refs; returns both SHAs and the differences."""
+    sha1, old = fetch_catalog(ref1)
+    sha2, new = fetch_catalog(ref2)
+    return sha1, sha2, diff_catalogs(old, new)
+
+
+# Slack truncates long messages; stay well under its limits.
+MAX_DIFF_LINES = 60
+MAX_DIFF_VALUES = 20
+MAX_DIFF_CHARS = 3500
+
+
+def _values_line(sign: str, values: List[str]) -> str:
+    line = f"  {sign} " + ", ".join(values[:MAX_DIFF_VALUES])
+    if len(values) > MAX_DIFF_VALUES:
+        line += f" …and {len(values) - MAX_DIFF_VALUES} more"
+    return line
+
+
+def format_diff(ref1: str, ref2: str, diffs: List[CategoryDiff], max_lines: int = MAX_DIFF_LINES,
+                max_chars: int = MAX_DIFF_CHARS) -> str:
+    """Slack message for ``diffs``, capped at ``max_lines`` lines and ``max_chars`` characters."""
+    if not diffs:
+        return f"No mCIDE value changes between `{ref1}` and `{ref2}`."
+    lines = [f"*mCIDE changes from `{ref1}` to `{ref2}`* ({len(diffs)} variable{'s' if len(diffs) != 1 else ''})"]
+    size = len(lines[0])
+    for shown, d in enumerate(diffs):
+        block = [f"*{d.table}.{d.variable}*"]
+        if d.added:
+            block.append(_values_line("+", d.added))
+        if d.removed:
+            block.append(_values_line("−", d.removed))
+        block_size = sum(len(line) + 1 for line in block)
+        if len(lines) + len(block) > max_lines or size + block_size > max_chars:
+            lines.append(f"…and {len(diffs) - shown} more variable{'s' if len(diffs) - shown != 1 else ''}.")
+            break
+        lines.extend(block)
+        size += block_size
+    return "\n".join(lines)
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
+import codecs
 from dataclasses import dataclass
-from typing import List
+from typing import Any, Iterable, Iterator, List, Tuple
 import re
-import requests
-import yaml
 
+from . import github, tracing
+from .github import RAW_URL
 
-@dataclass
+
+@dataclass(slots=True)
 class ProjectMetadata:
     """Structured metadata about a CLIF project."""
 
@@ -16,11 +18,102 @@ class ProjectMetadata:
     tables_required: List[str]
 
 
+# Only the first few lines of a README matter, but some embed large tables
+# or base64 images, so stop reading after this many bytes.
+README_MAX_BYTES = 256 * 1024
+
+_HEADING_PREFIX = re.compile(r"^#*\s*")
+_TABLES_REQUIRED = re.compile(r"tables? required[:\-]?\s*(.*)", re.I)
+_LIST_ITEM = re.compile(r"^(?:[-*+]|\d+[.)])\s+(.*)$")
+_TABLE_SEPARATOR = re.compile(r"[,;]")
+# Paired emphasis around a token (*x*, **x**, _x_, __x__).  Underscores only
+# count at word boundaries, so table names like respiratory_support survive.
+_EMPHASIS = re.compile(r"(\*{1,2})(?=\S)(.+?)(?<=\S)\1|(?<!\w)(_{1,2})(?=\S)(.+?)(?<=\S)\3(?!\w)")
+_MARKUP = re.compile(r"[`*\[\]]|\(.*?\)")
+
+
+def _table_names(text: str) -> List[str]:
+    text = _MARKUP.sub("", _EMPHASIS.sub(lambda m: m.group(2) or m.group(4), text))
+    return [t.strip() for t in _TABLE_SEPARATOR.split(text) if t.strip()]
+
+
+def table_list(value: Any) -> List[str]:
+    """Normalise a ``tables_required`` value from ``project.yaml`` or JSON.
+
+    ``None`` (an empty YAML key) reads as no tables and a string is split on
+    ``,``/``;``.
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [t.strip() for t in _TABLE_SEPARATOR.split(value) if t.strip()]
+    return [str(t) for t in value]
+
+
+def _stream_lines(response, max_bytes: int = README_MAX_BYTES, chunk_size: int = 8192) -> Iterator[str]:
+    """Yield decoded lines from a streamed response, reading at most ``max_bytes``."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    read = 0
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        read += len(chunk)
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        yield from lines
+        if read >= max_bytes:
+            return
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+def parse_readme_lines(lines: Iterable[str]) -> Tuple[str, str, List[str]]:
+    """Extract the title, description and required tables from README lines.
+
+    The title is the first non-blank line and the description the second.
+    Tables come from a ``Tables required: a, b`` line or, when that line
+    has nothing after it (e.g. a ``## Tables required`` heading), from the
+    markdown list that follows.  Lines are consumed only until all three
+    are found.
+    """
+    project_name = ""
+    description = ""
+    tables_required: List[str] = []
+    collecting = False
+    for line in lines:
+        stripped = line.strip()
+        if collecting:
+            item = _LIST_ITEM.match(stripped)
+            if item:
+                tables_required.extend(_table_names(item.group(1)))
+                continue
+            if not stripped and not tables_required:
+                continue
+            collecting = False
+            if tables_required and description:
+                break
+        if not stripped:
+            continue
+        if not project_name:
+            project_name = _HEADING_PREFIX.sub("", stripped)
+            continue
+        if not description:
+            description = stripped
+        match = _TABLES_REQUIRED.search(stripped)
+        if match:
+            tables_required = _table_names(match.group(1))
+            if tables_required:
+                break
+            collecting = True
+    return project_name, description, tables_required
+
+
 def _github_raw_url(repo_url: str, path: str) -> str:
     owner_repo = repo_url.rstrip("/").split("github.com/")[1]
-    return f"https://raw.githubusercontent.com/{owner_repo}/main/{path}"
+    return f"{RAW_URL}/{owner_repo}/main/{path}"
 
 
+@tracing.traced("metadata.parse_repo")
 def parse_repo(repo_url: str) -> ProjectMetadata:
     """Fetch and parse project metadata from a GitHub repository.
 
@@ -33,37 +126,30 @@ def parse_repo(repo_url: str) -> ProjectMetadata:
     # Try structured metadata files first
     for path in ("project.yaml", "metadata.json"):
         url = _github_raw_url(repo_url, path)
-        response = requests.get(url)
+        response = github.get(url)
         if response.status_code == 200:
             if path.endswith(".yaml"):
+                import yaml  # deferred: only needed for YAML-described repos
+
                 data = yaml.safe_load(response.text)
             else:
                 data = response.json()
             project_name = data.get("project_name") or data.get("name") or ""
             description = data.get("description", "")
-            tables = data.get("tables_required", [])
+            tables = table_list(data.get("tables_required"))
             return ProjectMetadata(project_name, description, tables)
 
-    # Fall back to README parsing
+    # Fall back to README parsing, streaming only as much as needed
     url = _github_raw_url(repo_url, "README.md")
-    response = requests.get(url)
+    response = github.get(url, stream=True)
     project_name = ""
     description = ""
     tables_required: List[str] = []
-    if response.status_code == 200:
-        lines = response.text.splitlines()
-        for line in lines:
-            stripped = line.strip()
-            if not stripped:
-                continue
+    try:
+        if response.status_code == 200:
+            project_name, description, tables_required = parse_readme_lines(_stream_lines(response))
             if not project_name:
-                project_name = re.sub(r"^#*\s*", "", stripped)
-                continue
-            if not description:
-                description = stripped
-            match = re.search(r"tables? required[:\-]?\s*(.*)", stripped, re.I)
-            if match:
-                tables_required = [t.strip() for t in re.split(r"[,;]", match.group(1)) if t.strip()]
-        if not project_name:
-            project_name = repo_url.rstrip("/").split("/")[-1]
+                project_name = repo_url.rstrip("/").split("/")[-1]
+    finally:
+        response.close()
     return ProjectMetadata(project_name, description, tables_required)
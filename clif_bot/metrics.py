@@ -0,0 +1,255 @@
+"""In-process metrics with a Prometheus-style ``/metrics`` endpoint.
+
+Metrics are kept in a module-level registry.  Set ``METRICS_PORT`` to expose
+them over HTTP (see :func:`start_http_server`) and ``CLIF_METRICS_LOG=1`` to
+also write every observation to stderr as a structured JSON line.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Callable, Dict, List, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:  # pragma: no cover - overridden
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (per-bucket counts incl. +Inf, sum, count)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s, n)) for k, (c, s, n) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+LISTENER_ACK_SECONDS = REGISTRY.register(Histogram(
+    "clif_listener_ack_seconds", "Time from listener start until ack() was called.", ["listener"]))
+LISTENER_SECONDS = REGISTRY.register(Histogram(
+    "clif_listener_seconds", "Total Slack listener run time.", ["listener"]))
+LISTENER_ERRORS = REGISTRY.register(Counter(
+    "clif_listener_errors_total", "Slack listeners that raised an exception.", ["listener"]))
+GITHUB_SECONDS = REGISTRY.register(Histogram(
+    "clif_github_request_seconds", "GitHub HTTP request latency.", ["method", "endpoint"]))
+GITHUB_RESPONSES = REGISTRY.register(Counter(
+    "clif_github_responses_total", "GitHub HTTP responses by status code.", ["method", "endpoint", "status"]))
+GITHUB_RATE_REMAINING = REGISTRY.register(Gauge(
+    "clif_github_ratelimit_remaining", "Last X-RateLimit-Remaining seen from GitHub.", ["resource"]))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "clif_cache_requests_total", "Cache lookups by result (hit or miss).", ["cache", "result"]))
+SAVE_SECONDS = REGISTRY.register(Histogram(
+    "clif_store_save_seconds", "StatusStore.save_data duration."))
+SAVE_BYTES = REGISTRY.register(Histogram(
+    "clif_store_save_bytes", "Size of the persisted StatusStore file.", buckets=SIZE_BUCKETS))
+REMINDER_DIGESTS = REGISTRY.register(Counter(
+    "clif_reminder_digests_total", "Reminder digest DMs by result (sent, rate_limited, failed).", ["result"]))
+
+
+def log_event(event: str, **fields) -> None:
+    """Write a structured JSON line to stderr when ``CLIF_METRICS_LOG`` is enabled.
+
+    Written directly rather than through :mod:`logging`, which drops INFO
+    records unless the application configures a handler.
+    """
+    if os.environ.get("CLIF_METRICS_LOG", "0") in ("", "0"):
+        return
+    print(json.dumps({"event": event, "ts": time.time(), **fields}, default=str), file=sys.stderr, flush=True)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def cache_hit_ratio(cache: str) -> float:
+    hits = CACHE_REQUESTS.get(cache=cache, result="hit")
+    total = hits + CACHE_REQUESTS.get(cache=cache, result="miss")
+    return hits / total if total else 0.0
+
+
+def instrument_listener(name: str) -> Callable:
+    """Decorate a Bolt listener to record ack latency, total latency and errors.
+
+    The wrapper keeps the listener's signature visible (via ``functools.wraps``)
+    so Bolt still injects the same keyword arguments.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            ack = kwargs.get("ack")
+            if ack is not None:
+                acked = []
+
+                def timed_ack(*a, **kw):
+                    if not acked:
+                        acked.append(time.perf_counter() - start)
+                        LISTENER_ACK_SECONDS.observe(acked[0], listener=name)
+                    return ack(*a, **kw)
+
+                kwargs["ack"] = timed_ack
+            error = None
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                error = e
+                LISTENER_ERRORS.inc(listener=name)
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                LISTENER_SECONDS.observe(elapsed, listener=name)
+                log_event("listener", listener=name, seconds=elapsed, error=repr(error) if error else None)
+
+        return wrapper
+
+    return decorator
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> "ThreadingHTTPServer":
+    """Serve ``REGISTRY`` at ``/metrics`` from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = REGISTRY.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
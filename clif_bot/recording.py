@@ -0,0 +1,36 @@
+"""Record incoming Slack payloads for load testing.
+
+With ``CLIF_RECORD_FILE`` set, :func:`middleware` appends every request
+Bolt receives (slash commands, block actions, view submissions) to that
+file, one JSON object per line: ``{"ts": <unix time>, "body": <payload>}``.
+``benchmarks/replay.py`` replays such a file against the app.
+
+The legacy verification ``token`` field is dropped.  Everything else is
+kept as Slack sent it, including user IDs and typed text, so treat the
+recording like the data file.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Any, Callable, Dict
+
+REDACTED_FIELDS = ("token",)
+
+
+def middleware(path: str) -> Callable:
+    """Bolt global middleware that appends each request body to ``path``."""
+    lock = threading.Lock()
+
+    def record_payload(body: Dict[str, Any], next: Callable[[], Any]) -> Any:
+        entry = {"ts": time.time(), "body": {k: v for k, v in body.items() if k not in REDACTED_FIELDS}}
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        try:
+            with lock, open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except Exception as e:
+            print(f"Error recording payload: {e}")
+        return next()
+
+    return record_payload
@@ -0,0 +1,323 @@
+"""Batched reminder digests for site POCs.
+
+Instead of one reminder per site and project, every POC gets at most one DM
+per interval.  The DM lists all active projects still waiting on their site
+(❓ or 🛠) and released at a known time.  A POC assigned to a single
+project only hears about that one.
+
+Timers live in one :class:`Scheduler` heap, serviced by one thread; the
+bot's other periodic jobs share it.  Each job's next due time is persisted
+next to the data file, so a restart neither re-sends a digest nor skips
+one.  Both the clock and ``sleep`` can be injected, so the scheduler can be
+tested without real time passing.
+
+The digest is configured from the environment (see :func:`configure`):
+
+``CLIF_REMINDER_INTERVAL_HOURS``
+    Hours between digests.  Reminders are off unless this is set above 0.
+``CLIF_REMINDER_MIN_AGE_HOURS``
+    Only remind about projects released at least this long ago (default 24).
+``CLIF_QUIET_HOURS``
+    Local-time window with no DMs, e.g. ``22:00-08:00`` (default unset).
+``CLIF_REMINDER_TZ``
+    IANA time zone for the quiet hours (default: the server's local zone).
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, tzinfo
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import metrics, tracing
+from .state import SITE_INDEX, SITES, Status
+
+Clock = Callable[[], float]
+Job = Callable[[float], float]
+
+ERROR_RETRY_SECONDS = 15 * 60
+MAX_DIGEST_ITEMS = 40
+
+
+class Scheduler:
+    """Recurring named jobs on a single timer heap, persisted to ``path``.
+
+    A job is called as ``job(now)`` and returns when it should next run.
+    Rescheduling a job leaves its old heap entry in place, and that entry is
+    skipped when it is popped.
+    """
+
+    def __init__(self, path: Optional[str] = None, clock: Clock = time.time) -> None:
+        self.path = path
+        self.clock = clock
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._jobs: Dict[str, Job] = {}
+        self._due: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._saved = self._load()
+
+    def _load(self) -> Dict[str, float]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return {name: float(due) for name, due in json.load(f).get("jobs", {}).items()}
+        except Exception as e:
+            print(f"Error loading schedule: {e}")
+            return {}
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        try:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"jobs": self._due}, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"Error saving schedule: {e}")
+
+    def _push(self, name: str, due: float) -> None:
+        self._due[name] = due
+        heapq.heappush(self._heap, (due, next(self._seq), name))
+
+    def add(self, name: str, job: Job, first_due: Optional[float] = None) -> float:
+        """Register ``job``; a persisted due time takes precedence over ``first_due``."""
+        with self._lock:
+            self._jobs[name] = job
+            due = self._saved.get(name, self.clock() if first_due is None else first_due)
+            self._push(name, due)
+            self._save()
+        self._wake.set()
+        return due
+
+    def due(self, name: str) -> Optional[float]:
+        return self._due.get(name)
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def run_pending(self, now: Optional[float] = None) -> List[str]:
+        """Run every job due at ``now``; returns the names of the jobs run."""
+        now = self.clock() if now is None else now
+        ran = []
+        while True:
+            with self._lock:
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                due, _, name = heapq.heappop(self._heap)
+                if self._due.get(name) != due:
+                    continue
+            try:
+                next_due = self._jobs[name](now)
+            except Exception as e:
+                print(f"Error running scheduled job {name}: {e}")
+                next_due = now + ERROR_RETRY_SECONDS
+            with self._lock:
+                self._push(name, max(next_due, now))
+            ran.append(name)
+        if ran:
+            with self._lock:
+                self._save()
+        return ran
+
+    def run_forever(self, stop: threading.Event, max_wait: float = 60.0) -> None:
+        """Service the heap until ``stop`` is set.
+
+        The wait is capped at ``max_wait`` seconds so that clock jumps, such
+        as a suspended host, are noticed.
+        """
+        while not stop.is_set():
+            self.run_pending()
+            next_due = self.next_due()
+            timeout = max_wait if next_due is None else min(max_wait, max(0.0, next_due - self.clock()))
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def start(self) -> threading.Event:
+        stop = threading.Event()
+        threading.Thread(
+            target=tracing.propagate(self.run_forever), args=(stop,), name="scheduler", daemon=True
+        ).start()
+        return stop
+
+
+class QuietHours:
+    """A daily ``start``-``end`` window in local time (may wrap past midnight)."""
+
+    def __init__(self, start_minute: int, end_minute: int, tz: Optional[tzinfo] = None) -> None:
+        self.start = start_minute
+        self.end = end_minute
+        self.tz = tz
+
+    @classmethod
+    def parse(cls, spec: str, tz: Optional[tzinfo] = None) -> "QuietHours":
+        """Parse ``"22:00-08:00"`` or ``"22-8"``."""
+
+        def minutes(part: str) -> int:
+            hours, _, mins = part.strip().partition(":")
+            value = int(hours) * 60 + int(mins or 0)
+            if not 0 <= value < 24 * 60:
+                raise ValueError(f"Invalid time {part!r} in quiet hours {spec!r}")
+            return value
+
+        start, sep, end = spec.partition("-")
+        if not sep:
+            raise ValueError(f"Quiet hours must look like 22:00-08:00, got {spec!r}")
+        return cls(minutes(start), minutes(end), tz)
+
+    def contains(self, now: float) -> bool:
+        local = datetime.fromtimestamp(now, self.tz)
+        minute = local.hour * 60 + local.minute
+        if self.start <= self.end:
+            return self.start <= minute < self.end
+        return minute >= self.start or minute < self.end
+
+    def next_allowed(self, now: float) -> float:
+        """``now`` outside the window, else the time the window ends."""
+        if not self.contains(now):
+            return now
+        local = datetime.fromtimestamp(now, self.tz)
+        end = local.replace(hour=self.end // 60, minute=self.end % 60, second=0, microsecond=0)
+        if end <= local:
+            end += timedelta(days=1)
+        return end.timestamp()
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds to wait if ``error`` is a Slack 429, else ``None``."""
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) != 429:
+        return None
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After", 1))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+class DigestReminder:
+    """Scheduler job that sends each POC one digest of their pending projects."""
+
+    def __init__(
+        self,
+        store,
+        client,
+        interval: float = 86400.0,
+        min_age: float = 86400.0,
+        quiet: Optional[QuietHours] = None,
+        send_interval: float = 1.0,
+        max_retries: int = 3,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.store = store
+        self.client = client
+        self.interval = interval
+        self.min_age = min_age
+        self.quiet = quiet
+        # chat.postMessage allows roughly one message per second per channel.
+        self.send_interval = send_interval
+        self.max_retries = max_retries
+        self.sleep = sleep
+
+    def pending_by_poc(self, now: float) -> Dict[str, Tuple[str, List[Tuple[str, Any]]]]:
+        """``{user_id: (site, [(repo_url, ProjectStatus), ...])}`` for POCs with pending projects."""
+        by_site: Dict[str, List[Tuple[str, Any]]] = {site: [] for site in SITES}
+        for repo_url, project in self.store.items():
+            # Legacy projects have no release time; they are never reminded about.
+            if not project.released_at or now - project.released_at < self.min_age:
+                continue
+            for index, code in enumerate(project.codes):
+                if code in (Status.UNKNOWN, Status.IN_PROGRESS):
+                    by_site[SITES[index]].append((repo_url, project))
+        digests = {}
+        for user_id, site in self.store.poc_items():
+            if site not in SITE_INDEX:
+                continue
+            assigned = self.store.poc_assignments.get(site, {}).get(user_id, "General")
+            pending = [
+                item for item in by_site[site]
+                if assigned == "General" or item[1].metadata.project_name == assigned
+            ]
+            if pending:
+                digests[user_id] = (site, pending)
+        return digests
+
+    def digest_text(self, site: str, pending: List[Tuple[str, Any]], now: float) -> str:
+        index = SITE_INDEX[site]
+        count = len(pending)
+        lines = [f"⏰ *CLIF digest for {site}*: {count} project{'s are' if count != 1 else ' is'} waiting on your site."]
+        for repo_url, project in pending[:MAX_DIGEST_ITEMS]:
+            status = Status(project.codes[index])
+            label = "in progress" if status == Status.IN_PROGRESS else "no response yet"
+            age = f", released {(now - project.released_at) / 86400:.0f}d ago" if project.released_at else ""
+            lines.append(f"• {status.emoji} *{project.metadata.project_name}* – {label}{age} – {repo_url}")
+        if count > MAX_DIGEST_ITEMS:
+            lines.append(f"…and {count - MAX_DIGEST_ITEMS} more.")
+        lines.append("Use `/clif-my-projects` to update them all at once.")
+        return "\n".join(lines)
+
+    def send(self, user_id: str, text: str) -> bool:
+        """DM ``text`` to ``user_id``, waiting out Slack rate limits."""
+        for _ in range(self.max_retries + 1):
+            try:
+                self.client.chat_postMessage(channel=user_id, text=text)
+                metrics.REMINDER_DIGESTS.inc(result="sent")
+                return True
+            except Exception as e:
+                wait = _retry_after(e)
+                if wait is None:
+                    print(f"Error sending reminder to {user_id}: {e}")
+                    break
+                metrics.REMINDER_DIGESTS.inc(result="rate_limited")
+                self.sleep(wait)
+        metrics.REMINDER_DIGESTS.inc(result="failed")
+        return False
+
+    @tracing.traced("reminders.digest")
+    def __call__(self, now: float) -> float:
+        if self.quiet is not None:
+            allowed = self.quiet.next_allowed(now)
+            if allowed > now:
+                return allowed
+        for position, (user_id, (site, pending)) in enumerate(self.pending_by_poc(now).items()):
+            if position:
+                self.sleep(self.send_interval)
+            self.send(user_id, self.digest_text(site, pending, now))
+        return now + self.interval
+
+
+def configure(client, store, scheduler: Scheduler) -> bool:
+    """Add the digest job to ``scheduler`` from environment settings.
+
+    Returns False if reminders are disabled.
+    """
+    hours = float(os.environ.get("CLIF_REMINDER_INTERVAL_HOURS", "0") or 0)
+    if hours <= 0:
+        return False
+    quiet = None
+    if os.environ.get("CLIF_QUIET_HOURS"):
+        tz = None
+        if os.environ.get("CLIF_REMINDER_TZ"):
+            from zoneinfo import ZoneInfo
+
+            tz = ZoneInfo(os.environ["CLIF_REMINDER_TZ"])
+        quiet = QuietHours.parse(os.environ["CLIF_QUIET_HOURS"], tz)
+    digest = DigestReminder(
+        store,
+        client,
+        interval=hours * 3600,
+        min_age=float(os.environ.get("CLIF_REMINDER_MIN_AGE_HOURS", "24")) * 3600,
+        quiet=quiet,
+    )
+    scheduler.add("digest", digest, first_due=scheduler.clock() + digest.interval)
+    return True
@@ -0,0 +1,146 @@
+"""Compact binary snapshot of a :class:`~clif_bot.state.StatusStore`.
+
+The JSON data file stays the source of truth.  :meth:`StatusStore.save_data`
+also writes this snapshot, stamped with the size and mtime of the JSON file
+it mirrors.  On start-up, a snapshot whose stamp still matches is
+memory-mapped instead of parsing the JSON.  Only its index of repo URLs is
+read up front.  Each project is decoded the first time it is accessed (see
+:class:`LazyProjects`).
+
+Layout (little-endian)::
+
+    header   MAGIC, version u16, site count u16, project count u32,
+             json size u64, json mtime_ns u64, extra offset u64, extra length u32,
+             index offset u64
+    records  per project: status codes (one byte per site), released_at f64,
+             UTF-8 JSON metadata
+    extra    UTF-8 JSON {"pocs": ..., "poc_assignments": ...}
+    index    per project: url length u16, url, record offset u64, record length u32
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import threading
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+MAGIC = b"CLIFSNP1"
+VERSION = 1
+_HEADER = struct.Struct("<8sHHIQQQIQ")
+_INDEX_ENTRY = struct.Struct("<QI")
+_RELEASED = struct.Struct("<d")
+# Writers share the ``.tmp`` path, so writes are serialised.
+_WRITE_LOCK = threading.Lock()
+
+
+def _stamp(json_path: str) -> Tuple[int, int]:
+    st = os.stat(json_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def encode_project(project) -> bytes:
+    return bytes(project.codes) + _RELEASED.pack(project.released_at) + project.metadata_json()
+
+
+class LazyProjects(MutableMapping):
+    """``{repo_url: ProjectStatus}`` that decodes projects from a snapshot on demand."""
+
+    def __init__(self, buffer, offsets: Dict[str, Tuple[int, int]], n_sites: int, decode) -> None:
+        self._buffer = buffer
+        self._n_sites = n_sites
+        self._decode = decode
+        # A value is either a decoded ProjectStatus or its (offset, length) in the buffer.
+        self._entries: Dict[str, Union[Any, Tuple[int, int]]] = dict(offsets)
+
+    def raw(self, key: str) -> Optional[bytes]:
+        """Encoded bytes of a project that has not been decoded yet, else ``None``."""
+        entry = self._entries[key]
+        if isinstance(entry, tuple):
+            offset, length = entry
+            return self._buffer[offset:offset + length]
+        return None
+
+    def __getitem__(self, key: str):
+        entry = self._entries[key]
+        if isinstance(entry, tuple):
+            raw = self.raw(key)
+            codes = bytearray(raw[:self._n_sites])
+            (released_at,) = _RELEASED.unpack_from(raw, self._n_sites)
+            metadata = json.loads(raw[self._n_sites + _RELEASED.size:].decode("utf-8"))
+            entry = self._entries[key] = self._decode(metadata, codes, released_at)
+        return entry
+
+    def __setitem__(self, key: str, value) -> None:
+        self._entries[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._entries[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+
+def write(path: str, json_path: str, projects, pocs: Dict[str, str], poc_assignments: Dict[str, Any], n_sites: int) -> None:
+    """Write a snapshot of ``projects`` matching the current ``json_path``.
+
+    The caller must not rewrite ``json_path`` concurrently, or the stamp
+    may describe a different version of the file than ``projects``.
+    """
+    records: List[bytes] = []
+    index: List[bytes] = []
+    offset = _HEADER.size
+    for repo_url in projects:
+        raw = projects.raw(repo_url) if isinstance(projects, LazyProjects) else None
+        record = raw if raw is not None else encode_project(projects[repo_url])
+        key = repo_url.encode("utf-8")
+        index.append(struct.pack("<H", len(key)) + key + _INDEX_ENTRY.pack(offset, len(record)))
+        records.append(record)
+        offset += len(record)
+    extra = json.dumps({"pocs": pocs, "poc_assignments": poc_assignments}, ensure_ascii=False).encode("utf-8")
+    size, mtime_ns = _stamp(json_path)
+    header = _HEADER.pack(MAGIC, VERSION, n_sites, len(records), size, mtime_ns, offset, len(extra), offset + len(extra))
+    tmp = path + ".tmp"
+    with _WRITE_LOCK:
+        with open(tmp, "wb") as f:
+            f.write(header)
+            f.writelines(records)
+            f.write(extra)
+            f.writelines(index)
+        # Replace rather than rewrite: an existing mapping keeps the old inode.
+        os.replace(tmp, path)
+
+
+def load(path: str, json_path: str, n_sites: int, decode) -> Optional[Tuple[LazyProjects, Dict[str, Any]]]:
+    """Map ``path`` if it is a valid snapshot of ``json_path``.
+
+    Returns ``(projects, extra)``, or ``None`` when the snapshot is missing,
+    stale or was written for a different site list.
+    """
+    if not (os.path.exists(path) and os.path.exists(json_path)):
+        return None
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < _HEADER.size:
+            return None
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, sites, count, size, mtime_ns, extra_offset, extra_len, index_offset = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != VERSION or sites != n_sites or (size, mtime_ns) != _stamp(json_path):
+        buffer.close()
+        return None
+    offsets: Dict[str, Tuple[int, int]] = {}
+    pos = index_offset
+    for _ in range(count):
+        (key_len,) = struct.unpack_from("<H", buffer, pos)
+        key = buffer[pos + 2:pos + 2 + key_len].decode("utf-8")
+        offsets[key] = _INDEX_ENTRY.unpack_from(buffer, pos + 2 + key_len)
+        pos += 2 + key_len + _INDEX_ENTRY.size
+    extra = json.loads(buffer[extra_offset:extra_offset + extra_len].decode("utf-8"))
+    return LazyProjects(buffer, offsets, n_sites, decode), extra
@@ -0,0 +1,40 @@
+"""Start-up phase timing.
+
+Import this module first so :data:`PROCESS_START` is as close to interpreter
+start as possible, then wrap each start-up step in :func:`phase`.
+"""
+from __future__ import annotations
+
+import contextlib
+import time
+from typing import Dict, Iterator
+
+PROCESS_START = time.perf_counter()
+PHASES: Dict[str, float] = {}
+_last = PROCESS_START
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Record how long the enclosed block takes under ``name``."""
+    global _last
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _last = time.perf_counter()
+        PHASES[name] = PHASES.get(name, 0.0) + _last - start
+
+
+def mark(name: str) -> None:
+    """Record the time since the previous phase ended (or since import)."""
+    global _last
+    now = time.perf_counter()
+    PHASES[name] = PHASES.get(name, 0.0) + now - _last
+    _last = now
+
+
+def report() -> str:
+    total = time.perf_counter() - PROCESS_START
+    parts = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in PHASES.items())
+    return f"Startup {total * 1000:.0f}ms ({parts})"
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import itertools
 import json
 import os
-from dataclasses import dataclass, field, asdict
-from typing import Dict, List
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, MutableMapping, Optional, Tuple
 
-from .metadata import ProjectMetadata
+from . import metrics, snapshot
+from .archive import ProjectArchive
+from .metadata import ProjectMetadata, table_list
+from .stats import ARCHIVE, RELEASE, StatusEvent, StatusEventLog
 
-SITES = [
+SITES = [sys.intern(site) for site in [
     "University of Chicago",
     "Emory University",
     "John Hopkins University",
@@ -20,29 +28,219 @@ SITES = [
     "University of Pennsylvania",
     "University of Toronto",
     "MIMIC-IV",
-]
+]]
+SITE_INDEX = {site: i for i, site in enumerate(SITES)}
+_VERSIONS = itertools.count(1)
 
 
-@dataclass
+class Status(IntEnum):
+    """Per-site run status, stored as one byte per site."""
+
+    UNKNOWN = 0
+    IN_PROGRESS = 1
+    COMPLETED = 2
+    DECLINED = 3
+
+    @property
+    def emoji(self) -> str:
+        return STATUS_EMOJI[self]
+
+    @classmethod
+    def from_emoji(cls, emoji: str) -> "Status":
+        try:
+            return _EMOJI_STATUS[emoji]
+        except KeyError:
+            raise ValueError(f"Unknown status {emoji!r}") from None
+
+
+STATUS_EMOJI = ("❓", "🛠", "✅", "❌")
+_EMOJI_STATUS = {emoji: Status(code) for code, emoji in enumerate(STATUS_EMOJI)}
+
+
+@dataclass(slots=True)
 class ProjectStatus:
+    """Status of one project across all sites.
+
+    ``codes[i]`` holds the :class:`Status` of ``SITES[i]``.  On disk the
+    statuses are still written as the ``site_status`` emoji mapping.
+    ``released_at`` is a Unix timestamp, or 0 for projects released before
+    it was recorded.
+    """
+
     metadata: ProjectMetadata
-    site_status: Dict[str, str] = field(
-        default_factory=lambda: {site: "❓" for site in SITES}
+    codes: bytearray = field(default_factory=lambda: bytearray(len(SITES)))
+    released_at: float = 0.0
+    # Metadata never changes after release, so its snapshot encoding is cached.
+    _metadata_json: Optional[bytes] = field(default=None, init=False, repr=False, compare=False)
+
+    def metadata_json(self) -> bytes:
+        if self._metadata_json is None:
+            meta = self.metadata
+            self._metadata_json = json.dumps(
+                {"project_name": meta.project_name, "description": meta.description,
+                 "tables_required": list(meta.tables_required)},
+                ensure_ascii=False,
+            ).encode("utf-8")
+        return self._metadata_json
+
+    @property
+    def finished(self) -> bool:
+        """True once every site has completed or declined the project."""
+        return all(code in (Status.COMPLETED, Status.DECLINED) for code in self.codes)
+
+    @property
+    def site_status(self) -> Dict[str, str]:
+        """Read-only ``{site: emoji}`` view of the statuses."""
+        return {site: STATUS_EMOJI[code] for site, code in zip(SITES, self.codes)}
+
+    def get_status(self, site: str) -> str:
+        if site not in SITE_INDEX:
+            raise ValueError(f"Unknown site {site!r}")
+        return STATUS_EMOJI[self.codes[SITE_INDEX[site]]]
+
+    def set_status(self, site: str, status: str) -> None:
+        if site not in SITE_INDEX:
+            raise ValueError(f"Unknown site {site!r}")
+        self.codes[SITE_INDEX[site]] = Status.from_emoji(status)
+
+    def to_dict(self) -> Dict[str, Any]:
+        meta = self.metadata
+        return {
+            "metadata": {
+                "project_name": meta.project_name,
+                "description": meta.description,
+                "tables_required": list(meta.tables_required),
+            },
+            "site_status": self.site_status,
+            "released_at": self.released_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], dropped: Optional[List[str]] = None) -> "ProjectStatus":
+        """Build from :meth:`to_dict` output.
+
+        Unknown sites are ignored and unknown statuses read as ❓; each is
+        described in ``dropped`` if given.
+        """
+        meta = data["metadata"]
+        metadata = ProjectMetadata(
+            project_name=meta["project_name"],
+            description=meta["description"],
+            tables_required=[sys.intern(t) for t in table_list(meta.get("tables_required"))],
+        )
+        codes = bytearray(len(SITES))
+        for site, status in data.get("site_status", {}).items():
+            index = SITE_INDEX.get(site)
+            if index is None:
+                if dropped is not None:
+                    dropped.append(f"unknown site {site!r}")
+                continue
+            code = _EMOJI_STATUS.get(status)
+            if code is None and dropped is not None:
+                dropped.append(f"unknown status {status!r} for {site}")
+            codes[index] = Status.UNKNOWN if code is None else code
+        return cls(metadata, codes, float(data.get("released_at") or 0.0))
+
+
+def _decode_project(metadata: Dict[str, Any], codes: bytearray, released_at: float) -> ProjectStatus:
+    return ProjectStatus(
+        ProjectMetadata(
+            project_name=metadata["project_name"],
+            description=metadata["description"],
+            tables_required=[sys.intern(t) for t in metadata.get("tables_required") or []],
+        ),
+        codes,
+        released_at,
     )
 
 
 class StatusStore:
-    """Persistent store for project and point-of-contact information."""
+    """Persistent store for project and point-of-contact information.
+
+    ``projects`` only holds the active working set.  Projects that every
+    site has completed or declined, or that were released more than
+    ``archive_after_days`` ago, are moved to a :class:`ProjectArchive` next
+    to the data file (``<data_file>_archive.jsonl.gz`` by default).
+
+    Every release and status change is also recorded in a
+    :class:`StatusEventLog` (``<data_file>_events.jsonl`` and
+    ``<data_file>_stats.json``, which is written by ``save_data``).
+
+    ``save_data`` also writes a binary :mod:`~clif_bot.snapshot`
+    (``<data_file>.snapshot``).  On start-up a snapshot that matches the JSON
+    file is memory-mapped instead of parsing the JSON, and projects are
+    decoded on first access.  In that case the archive sweep is left to the
+    caller (see :meth:`archive_finished`) so start-up does not decode every
+    project.
 
-    def __init__(self, data_file: str = "clif_bot_data.json") -> None:
+    Bolt runs listeners on a thread pool, so every method that changes or
+    saves the store holds a re-entrant lock.  Readers that iterate the
+    store from a listener should use :meth:`items` and :meth:`poc_items`,
+    which copy under that lock.  The event log and snapshot writer have
+    locks of their own.
+    """
+
+    def __init__(
+        self,
+        data_file: str = "clif_bot_data.json",
+        archive_file: Optional[str] = None,
+        archive_after_days: Optional[float] = None,
+        use_snapshot: bool = True,
+    ) -> None:
         self.data_file = data_file
-        self.projects: Dict[str, ProjectStatus] = {}
+        self.projects: MutableMapping[str, ProjectStatus] = {}
         self.pocs: Dict[str, str] = {}  # user_id -> site name
         self.poc_assignments: Dict[str, Dict[str, str]] = {}  # site -> {user_id: project}
+        # Changes whenever the set of active projects does, so views built
+        # from it (see clif_bot.views.project_options) know to rebuild.
+        # Drawn from a process-wide counter, so it is unique across stores.
+        self.version = next(_VERSIONS)
+        self._lock = threading.RLock()
+        self.archive = ProjectArchive(archive_file or os.path.splitext(data_file)[0] + "_archive.jsonl.gz")
+        self.archive_after_days = archive_after_days
+        base = os.path.splitext(data_file)[0]
+        self.snapshot_file = base + ".snapshot" if use_snapshot else None
+        self.loaded_from_snapshot = False
+        self.events = StatusEventLog(base + "_events.jsonl", base + "_stats.json", SITES)
         self.load_data()
+        if self.projects and not self.events.rollups.events_total:
+            self._seed_events()
+        if not self.loaded_from_snapshot:
+            self.archive_finished()
+
+    def _seed_events(self) -> None:
+        """Describe projects that predate the event log as release/status events.
+
+        Projects without a release time are skipped rather than dated now.
+        The other projects' current statuses are marked as backfilled, since
+        when they changed is unknown, and stay out of the completion latencies.
+        """
+        now = time.time()
+        events = []
+        for repo_url, project in self.projects.items():
+            if not project.released_at:
+                continue
+            events.append(StatusEvent(project.released_at, repo_url, "", "", RELEASE, project.released_at))
+            for site, status in project.site_status.items():
+                if status != "❓":
+                    events.append(StatusEvent(now, repo_url, site, "❓", status, project.released_at, backfilled=True))
+        self.events.record(events)
+        self.events.flush()
 
     def load_data(self) -> None:
-        """Load data from JSON file if it exists."""
+        """Load data from the snapshot if it is current, else from the JSON file."""
+        if self.snapshot_file:
+            try:
+                loaded = snapshot.load(self.snapshot_file, self.data_file, len(SITES), _decode_project)
+            except Exception as e:
+                print(f"Error loading snapshot, falling back to JSON: {e}")
+                loaded = None
+            if loaded is not None:
+                self.projects, extra = loaded
+                self.pocs = extra.get('pocs', {})
+                self.poc_assignments = extra.get('poc_assignments', {})
+                self.loaded_from_snapshot = True
+                return
         if os.path.exists(self.data_file):
             try:
                 with open(self.data_file, 'r') as f:
@@ -50,15 +248,10 @@ class StatusStore:
                 
                 # Load projects
                 for repo_url, proj_data in data.get('projects', {}).items():
-                    metadata = ProjectMetadata(
-                        project_name=proj_data['metadata']['project_name'],
-                        description=proj_data['metadata']['description'],
-                        tables_required=proj_data['metadata']['tables_required']
-                    )
-                    self.projects[repo_url] = ProjectStatus(
-                        metadata=metadata,
-                        site_status=proj_data['site_status']
-                    )
+                    dropped: List[str] = []
+                    self.projects[repo_url] = ProjectStatus.from_dict(proj_data, dropped)
+                    if dropped:
+                        print(f"Warning: {repo_url} in {self.data_file}: dropped {', '.join(dropped)}")
                 
                 # Load POCs
                 self.pocs = data.get('pocs', {})
@@ -69,40 +262,61 @@ class StatusStore:
 
     def save_data(self) -> None:
         """Save data to JSON file."""
-        try:
-            data = {
-                'projects': {},
-                'pocs': self.pocs,
-                'poc_assignments': self.poc_assignments
-            }
-            
-            # Convert projects to serializable format
-            for repo_url, proj_status in self.projects.items():
-                data['projects'][repo_url] = {
-                    'metadata': asdict(proj_status.metadata),
-                    'site_status': proj_status.site_status
+        with self._lock:
+            self.events.flush()
+            start = time.perf_counter()
+            try:
+                data = {
+                    'projects': {},
+                    'pocs': self.pocs,
+                    'poc_assignments': self.poc_assignments
                 }
-            
-            with open(self.data_file, 'w') as f:
-                json.dump(data, f, indent=2)
-                
-        except Exception as e:
-            print(f"Error saving data: {e}")
+
+                # Convert projects to serializable format
+                for repo_url, proj_status in self.projects.items():
+                    data['projects'][repo_url] = proj_status.to_dict()
+
+                encoded = json.dumps(data, indent=2).encode("utf-8")
+                with open(self.data_file, 'wb') as f:
+                    f.write(encoded)
+
+                elapsed = time.perf_counter() - start
+                metrics.SAVE_SECONDS.observe(elapsed)
+                metrics.SAVE_BYTES.observe(len(encoded))
+                metrics.log_event("save_data", seconds=elapsed, bytes=len(encoded), projects=len(self.projects))
+
+            except Exception as e:
+                print(f"Error saving data: {e}")
+                return
+
+            if self.snapshot_file:
+                try:
+                    snapshot.write(
+                        self.snapshot_file, self.data_file, self.projects, self.pocs, self.poc_assignments, len(SITES)
+                    )
+                except Exception as e:
+                    print(f"Error saving snapshot: {e}")
 
     # --- POC management -------------------------------------------------
     def set_poc(self, site: str, user_id: str, project: str = None) -> None:
         """Set a POC for a site, optionally for a specific project."""
-        self.pocs[user_id] = site
-        
-        if site not in self.poc_assignments:
-            self.poc_assignments[site] = {}
-        
-        if project:
-            self.poc_assignments[site][user_id] = project
-        else:
-            self.poc_assignments[site][user_id] = "General"
-        
-        self.save_data()
+        with self._lock:
+            self.pocs[user_id] = site
+
+            if site not in self.poc_assignments:
+                self.poc_assignments[site] = {}
+
+            if project:
+                self.poc_assignments[site][user_id] = project
+            else:
+                self.poc_assignments[site][user_id] = "General"
+
+            self.save_data()
+
+    def poc_items(self) -> List[Tuple[str, str]]:
+        """``(user_id, site)`` pairs, copied under the store lock."""
+        with self._lock:
+            return list(self.pocs.items())
 
     def get_site_for_user(self, user_id: str) -> str | None:
         return self.pocs.get(user_id)
@@ -119,7 +333,7 @@ class StatusStore:
             return "Site POCs"
         # Group by site to handle multiple POCs per site
         site_pocs = {}
-        for user_id, site in self.pocs.items():
+        for user_id, site in self.poc_items():
             if site not in site_pocs:
                 site_pocs[site] = []
             site_pocs[site].append(f"<@{user_id}>")
@@ -134,20 +348,109 @@ class StatusStore:
         return "Site POCs"
 
     # --- Project tracking -----------------------------------------------
+    def items(self) -> List[Tuple[str, ProjectStatus]]:
+        """``(repo_url, ProjectStatus)`` pairs for the active projects, copied under the store lock."""
+        with self._lock:
+            return list(self.projects.items())
+
     def new_project(self, repo_url: str, metadata: ProjectMetadata) -> None:
-        self.projects[repo_url] = ProjectStatus(metadata)
-        self.save_data()
+        with self._lock:
+            project = self.projects[repo_url] = ProjectStatus(metadata, released_at=time.time())
+            self.version = next(_VERSIONS)
+            self.events.release(repo_url, project.released_at)
+            self.save_data()
 
     def set_site_status(self, repo_url: str, site: str, status: str) -> None:
-        self.projects[repo_url].site_status[site] = status
-        self.save_data()
+        """Update one site's status; raises ``KeyError`` for inactive projects."""
+        with self._lock:
+            project = self.projects[repo_url]
+            old = project.get_status(site)
+            project.set_status(site, status)
+            if old != status:
+                self.events.record([StatusEvent(time.time(), repo_url, site, old, status, project.released_at)])
+            if project.finished:
+                self._archive([repo_url])
+            self.save_data()
+
+    def set_site_statuses(self, site: str, updates: Dict[str, str]) -> Tuple[List[StatusEvent], List[str]]:
+        """Apply ``{repo_url: status}`` for one site as a single batch.
+
+        Everything is validated before anything changes, so an unknown site
+        or status raises ``ValueError`` and leaves the store untouched.
+        Projects that are no longer active are skipped.  The changes are
+        recorded as one event batch and saved once.  Returns the events for
+        the statuses that changed and the skipped repo URLs.
+        """
+        with self._lock:
+            if site not in SITE_INDEX:
+                raise ValueError(f"Unknown site {site!r}")
+            for status in updates.values():
+                Status.from_emoji(status)
+            skipped = [repo_url for repo_url in updates if repo_url not in self.projects]
+            now = time.time()
+            events = []
+            for repo_url, status in updates.items():
+                project = self.projects.get(repo_url)
+                if project is None:
+                    continue
+                old = project.get_status(site)
+                if old != status:
+                    project.set_status(site, status)
+                    events.append(StatusEvent(now, repo_url, site, old, status, project.released_at))
+            if events:
+                self.events.record(events)
+                finished = [e.repo_url for e in events if self.projects[e.repo_url].finished]
+                if finished:
+                    self._archive(finished, now)
+                self.save_data()
+            return events, skipped
+
+    # --- Archival ---------------------------------------------------------
+    def _is_stale(self, project: ProjectStatus, now: float) -> bool:
+        if not self.archive_after_days or not project.released_at:
+            return False
+        return now - project.released_at > self.archive_after_days * 86400
+
+    def _archive(self, repo_urls: List[str], now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        # Write the archive first: a crash in between leaves a duplicate
+        # rather than losing the project.
+        self.archive.append(
+            {"repo_url": repo_url, "archived_at": now, **self.projects[repo_url].to_dict()}
+            for repo_url in repo_urls
+        )
+        for repo_url in repo_urls:
+            del self.projects[repo_url]
+        self.events.record([StatusEvent(now, repo_url, "", "", ARCHIVE) for repo_url in repo_urls])
+        self.version = next(_VERSIONS)
+
+    def archive_finished(self, now: Optional[float] = None) -> List[str]:
+        """Move finished or stale projects to the archive; returns their URLs."""
+        with self._lock:
+            now = time.time() if now is None else now
+            done = [
+                repo_url for repo_url, project in self.projects.items()
+                if project.finished or self._is_stale(project, now)
+            ]
+            if done:
+                self._archive(done, now)
+                self.save_data()
+            return done
+
+    def archived_projects(self, page: int = 1, per_page: int = 20):
+        """Return ``([(repo_url, archived_at, ProjectStatus)], has_more)`` for one page."""
+        records, has_more = self.archive.page(page, per_page)
+        return [
+            (record["repo_url"], record.get("archived_at", 0.0), ProjectStatus.from_dict(record))
+            for record in records
+        ], has_more
 
     def status_table(self) -> str:
         if not self.projects:
             return "No active projects."
         
         # Get project names and create shorter versions if needed
-        projects = list(self.projects.values())
+        projects = [project for _, project in self.items()]
         project_names = []
         for proj in projects:
             name = proj.metadata.project_name
@@ -168,12 +471,32 @@ class StatusStore:
         lines = [" | ".join(header_parts)]
         lines.append("-" * (sum(col_widths) + 3 * (len(col_widths) - 1)))
         
-        # Create rows
-        for site in SITES:
+        # Create rows, padding each distinct (status, width) cell only once
+        cells = {}
+        for index, site in enumerate(SITES):
             row_parts = [site.ljust(site_width)]
             for i, proj in enumerate(projects):
-                status = proj.site_status.get(site, "❓")
-                row_parts.append(status.center(col_widths[i + 1]))
+                key = (proj.codes[index], col_widths[i + 1])
+                cell = cells.get(key)
+                if cell is None:
+                    cell = cells[key] = STATUS_EMOJI[key[0]].center(key[1])
+                row_parts.append(cell)
             lines.append(" | ".join(row_parts))
         
         return "\n".join(lines)
+
+
+def archive_job(store: StatusStore, interval: float = 86400) -> Callable[[float], float]:
+    """Scheduler job that runs :meth:`StatusStore.archive_finished` every ``interval`` seconds.
+
+    Projects are archived as soon as they finish, but the age threshold
+    (``archive_after_days``) is only reached with time passing.
+    """
+
+    def run(now: float) -> float:
+        archived = store.archive_finished(now)
+        if archived:
+            print(f"Archived {len(archived)} stale projects")
+        return now + interval
+
+    return run
@@ -0,0 +1,321 @@
+"""Status transition log and incrementally maintained rollups.
+
+Every status change is appended to a JSON-lines event log.  The same events
+update :class:`StatusRollups` in memory, so ``/clif-stats`` never rescans
+the log.  The rollups are written next to it by :meth:`StatusEventLog.flush`
+(once per store save, not per event), stamped with how much of the log they
+cover.  On load, any events logged after that are replayed, and the
+rollups can always be rebuilt from the log with
+:meth:`StatusEventLog.rebuild`.
+
+A project released again (a new run) resets its sites to ❓.  Completion
+latency is measured from a project's first release, once per site, and
+not at all for completions backfilled from older data.  When a
+project is archived its per-project state is dropped (its site counts
+stay), so the rollups grow with the active projects rather than with all
+history; releasing it again afterwards counts as a new project.
+
+Completion latencies (release to ✅) are kept in fixed log-scale
+histograms, so a percentile lookup costs the same however many events have
+been recorded.  Estimates are within half a bucket (about 10%).
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+RELEASE = "release"
+ARCHIVE = "archive"
+ALL_SITES = "*"
+COMPLETED = "✅"
+UNKNOWN = "❓"
+
+
+@dataclass(slots=True)
+class StatusEvent:
+    ts: float
+    repo_url: str
+    site: str  # "" for release events
+    old: str
+    new: str  # a status emoji, RELEASE or ARCHIVE
+    released_at: float = 0.0
+    # Describes a status that predates the log, so its timestamp is not
+    # when the change happened.
+    backfilled: bool = False
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram of durations in seconds (1 minute .. ~4 years)."""
+
+    MIN_SECONDS = 60.0
+    FACTOR = 1.2
+    BUCKETS = 80
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self, counts: Optional[List[int]] = None, count: int = 0, total: float = 0.0) -> None:
+        self.counts = counts or [0] * (self.BUCKETS + 1)
+        self.count = count
+        self.total = total
+
+    def _bucket(self, seconds: float) -> int:
+        if seconds <= self.MIN_SECONDS:
+            return 0
+        return min(self.BUCKETS, 1 + int(math.log(seconds / self.MIN_SECONDS, self.FACTOR)))
+
+    def _estimate(self, bucket: int) -> float:
+        # Geometric midpoint of the bucket; bucket 0 is everything up to a minute.
+        return self.MIN_SECONDS * self.FACTOR ** (bucket - 0.5) if bucket else self.MIN_SECONDS
+
+    def add(self, seconds: float) -> None:
+        self.counts[self._bucket(max(0.0, seconds))] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Estimate the ``q``-th percentile (0-100) in seconds."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self._estimate(bucket)
+        return self._estimate(self.BUCKETS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"counts": list(self.counts), "count": self.count, "total": self.total}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        return cls(list(data["counts"]), data["count"], data["total"])
+
+
+class StatusRollups:
+    """Running totals derived from status events."""
+
+    def __init__(self, sites: Iterable[str]) -> None:
+        self.sites = list(sites)
+        self.events_total = 0
+        # site -> status -> number of projects currently in that status
+        self.site_counts: Dict[str, Dict[str, int]] = {site: {} for site in self.sites}
+        # repo -> status -> number of sites currently in that status
+        self.project_counts: Dict[str, Dict[str, int]] = {}
+        # repo -> site -> status, for sites that are not ❓
+        self.statuses: Dict[str, Dict[str, str]] = {}
+        # repo -> first release time
+        self.released: Dict[str, float] = {}
+        # repo -> sites whose completion latency has been recorded
+        self.completed: Dict[str, Set[str]] = {}
+        # site (or ALL_SITES) -> release-to-completion latencies
+        self.completion: Dict[str, LatencyHistogram] = {}
+
+    @staticmethod
+    def _bump(counts: Dict[str, int], key: str, delta: int) -> None:
+        value = counts.get(key, 0) + delta
+        if value:
+            counts[key] = value
+        else:
+            counts.pop(key, None)
+
+    def _move(self, repo_url: str, site: str, old: str, new: str) -> None:
+        site_counts = self.site_counts.setdefault(site, {})
+        project_counts = self.project_counts.setdefault(repo_url, {})
+        self._bump(site_counts, old, -1)
+        self._bump(site_counts, new, 1)
+        self._bump(project_counts, old, -1)
+        self._bump(project_counts, new, 1)
+        statuses = self.statuses.setdefault(repo_url, {})
+        if new == UNKNOWN:
+            statuses.pop(site, None)
+        else:
+            statuses[site] = new
+
+    def apply(self, event: StatusEvent) -> None:
+        repo_url = event.repo_url
+        if event.new == ARCHIVE:
+            for state in (self.project_counts, self.statuses, self.released, self.completed):
+                state.pop(repo_url, None)
+            return
+        self.events_total += 1
+        if event.new == RELEASE:
+            if repo_url in self.released:
+                # A new run of a known project: back to ❓ everywhere.
+                for site, status in list(self.statuses.get(repo_url, {}).items()):
+                    self._move(repo_url, site, status, UNKNOWN)
+                return
+            self.released[repo_url] = event.released_at or event.ts
+            self.project_counts[repo_url] = {UNKNOWN: len(self.sites)}
+            for site in self.sites:
+                self._bump(self.site_counts.setdefault(site, {}), UNKNOWN, 1)
+            return
+        if repo_url not in self.released:
+            return  # released before the log existed; not tracked
+        self._move(repo_url, event.site, event.old, event.new)
+        done = self.completed.setdefault(repo_url, set())
+        if event.new == COMPLETED and event.site not in done:
+            done.add(event.site)
+            if event.backfilled:
+                return
+            latency = event.ts - self.released[repo_url]
+            for key in (event.site, ALL_SITES):
+                self.completion.setdefault(key, LatencyHistogram()).add(latency)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """A copy of the rollups as plain data."""
+        return {
+            "events_total": self.events_total,
+            "site_counts": {site: dict(counts) for site, counts in self.site_counts.items()},
+            "project_counts": {repo: dict(counts) for repo, counts in self.project_counts.items()},
+            "statuses": {repo: dict(statuses) for repo, statuses in self.statuses.items()},
+            "released": dict(self.released),
+            "completed": {repo: sorted(sites) for repo, sites in self.completed.items() if sites},
+            "completion": {k: h.to_dict() for k, h in self.completion.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, sites: Iterable[str], data: Dict[str, Any]) -> "StatusRollups":
+        rollups = cls(sites)
+        rollups.events_total = data.get("events_total", 0)
+        rollups.site_counts.update(data.get("site_counts", {}))
+        rollups.project_counts = data.get("project_counts", {})
+        rollups.statuses = data.get("statuses", {})
+        rollups.released = data.get("released", {})
+        rollups.completed = {repo: set(sites) for repo, sites in data.get("completed", {}).items()}
+        rollups.completion = {k: LatencyHistogram.from_dict(v) for k, v in data.get("completion", {}).items()}
+        return rollups
+
+
+class StatusEventLog:
+    """Append-only event log plus its persisted rollups.
+
+    Appends and rollup writes are serialised by a lock, since listeners
+    record events from several threads.
+    """
+
+    def __init__(self, events_file: str, rollup_file: str, sites: Iterable[str]) -> None:
+        self.events_file = events_file
+        self.rollup_file = rollup_file
+        self.sites = list(sites)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.rollups, self._log_size = self._load_rollups()
+
+    def _log_bytes(self) -> int:
+        return os.path.getsize(self.events_file) if os.path.exists(self.events_file) else 0
+
+    def _load_rollups(self) -> Tuple[StatusRollups, int]:
+        """The saved rollups brought up to date with the log, and the log size."""
+        size = self._log_bytes()
+        if os.path.exists(self.rollup_file):
+            try:
+                with open(self.rollup_file) as f:
+                    data = json.load(f)
+                covered = data.get("log_size")
+                # Files from before log_size was recorded are rebuilt.
+                if covered is not None and covered <= size:
+                    rollups = StatusRollups.from_dict(self.sites, data)
+                    for event in self._events_from(covered):
+                        rollups.apply(event)
+                        self._dirty = True
+                    return rollups, size
+            except Exception as e:
+                print(f"Error loading status rollups, rebuilding from events: {e}")
+        self._dirty = size > 0
+        return self.rebuild(), size
+
+    def _events_from(self, offset: int) -> Iterator[StatusEvent]:
+        if not os.path.exists(self.events_file):
+            return
+        with open(self.events_file, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if line.strip():
+                    yield StatusEvent(**json.loads(line))
+
+    def events(self) -> Iterable[StatusEvent]:
+        return self._events_from(0)
+
+    def rebuild(self) -> StatusRollups:
+        """Recompute the rollups by replaying the whole event log."""
+        rollups = StatusRollups(self.sites)
+        for event in self.events():
+            rollups.apply(event)
+        return rollups
+
+    def record(self, events: List[StatusEvent]) -> None:
+        """Append ``events`` and fold them into the in-memory rollups.
+
+        The rollup file is only rewritten by :meth:`flush`.
+        """
+        if not events:
+            return
+        data = "".join(json.dumps(asdict(e), ensure_ascii=False) + "\n" for e in events).encode("utf-8")
+        with self._lock:
+            with open(self.events_file, "ab") as f:
+                f.write(data)
+            self._log_size += len(data)
+            for event in events:
+                self.rollups.apply(event)
+            self._dirty = True
+
+    def snapshot(self) -> StatusRollups:
+        """A copy of the rollups that is safe to read while events are recorded."""
+        with self._lock:
+            data = self.rollups.to_dict()
+        return StatusRollups.from_dict(self.sites, data)
+
+    def flush(self) -> None:
+        """Write the rollups if events were recorded since the last flush."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = dict(self.rollups.to_dict(), log_size=self._log_size)
+            tmp = self.rollup_file + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self.rollup_file)
+            self._dirty = False
+
+    def release(self, repo_url: str, released_at: Optional[float] = None) -> None:
+        ts = time.time() if released_at is None else released_at
+        self.record([StatusEvent(ts, repo_url, "", "", RELEASE, ts)])
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "–"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    if seconds < 2 * 86400:
+        return f"{seconds / 3600:.1f}h"
+    return f"{seconds / 86400:.1f}d"
+
+
+def stats_table(rollups: StatusRollups) -> str:
+    """Per-site status counts and completion latency percentiles."""
+    site_width = max(len("Site"), *(len(site) for site in rollups.sites))
+    header = f"{'Site'.ljust(site_width)} |  ✅ |  🛠 |  ❌ |  ❓ | p50 done | p90 done"
+    lines = [header, "-" * len(header)]
+    for site in rollups.sites + [ALL_SITES]:
+        if site == ALL_SITES:
+            counts: Dict[str, int] = {}
+            for per_site in rollups.site_counts.values():
+                for status, n in per_site.items():
+                    counts[status] = counts.get(status, 0) + n
+            label = "All sites"
+        else:
+            counts = rollups.site_counts.get(site, {})
+            label = site
+        hist = rollups.completion.get(site)
+        p50 = format_duration(hist.percentile(50) if hist else None)
+        p90 = format_duration(hist.percentile(90) if hist else None)
+        cells = " | ".join(f"{counts.get(s, 0):3d}" for s in ("✅", "🛠", "❌", "❓"))
+        lines.append(f"{label.ljust(site_width)} | {cells} | {p50:>8} | {p90:>8}")
+    return "\n".join(lines)
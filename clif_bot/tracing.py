@@ -0,0 +1,333 @@
+"""Lightweight OpenTelemetry-compatible tracing.
+
+Spans are propagated with :mod:`contextvars` and exported in OTLP/JSON, either
+appended to a local file (one ``ExportTraceServiceRequest`` per line, the same
+layout as the OpenTelemetry Collector file exporter) or POSTed to an OTLP/HTTP
+collector.  Configuration comes from the environment:
+
+``CLIF_TRACE_EXPORTER``
+    ``file``, ``otlp`` or unset/``none`` to disable tracing entirely.
+``CLIF_TRACE_FILE``
+    Output path for the file exporter (default ``clif_bot_traces.jsonl``).
+``OTEL_EXPORTER_OTLP_ENDPOINT``
+    Collector base URL for the OTLP exporter (default ``http://localhost:4318``).
+``CLIF_TRACE_SAMPLE_RATE``
+    Fraction of root spans to record, between 0 and 1 (default 1).  Child
+    spans follow their root's decision so traces are never partial.
+"""
+from __future__ import annotations
+
+import atexit
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "clif-project-bot")
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("clif_span", default=None)
+
+STATUS_UNSET, STATUS_OK, STATUS_ERROR = 0, 1, 2
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+
+
+class Span:
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "kind", "start_ns", "end_ns",
+        "attributes", "events", "status", "status_message", "sampled",
+    )
+
+    def __init__(self, name: str, trace_id: str, parent_id: str, sampled: bool, kind: int = KIND_INTERNAL) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, Any] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self.sampled = sampled
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        if self.sampled:
+            self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = repr(exc)
+        self.add_event("exception", **{"exception.type": type(exc).__name__, "exception.message": str(exc)})
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "events": [
+                {"name": e["name"], "timeUnixNano": str(e["time_ns"]), "attributes": _otlp_attributes(e["attributes"])}
+                for e in self.events
+            ],
+            "status": {"code": self.status, "message": self.status_message},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items() if v is not None]
+
+
+def export_request(spans: List[Span]) -> Dict[str, Any]:
+    """Wrap finished spans in an OTLP ``ExportTraceServiceRequest`` body."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+            "scopeSpans": [{"scope": {"name": "clif_bot"}, "spans": [s.to_otlp() for s in spans]}],
+        }]
+    }
+
+
+class FileExporter:
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a") as f:
+            f.write(json.dumps(export_request(spans)) + "\n")
+
+
+class OtlpHttpExporter:
+    def __init__(self, endpoint: str) -> None:
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+
+    def export(self, spans: List[Span]) -> None:
+        import requests
+
+        # Deliberately not clif_bot.github.get_session(): exporting must not
+        # produce spans or metrics of its own.
+        requests.post(self.url, json=export_request(spans), timeout=5)
+
+
+class BatchProcessor:
+    """Buffer finished spans and export them from a background thread."""
+
+    def __init__(self, exporter, max_batch: int = 256, interval: float = 2.0) -> None:
+        self.exporter = exporter
+        self.max_batch = max_batch
+        self.interval = interval
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=10_000)
+        self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+        self._thread.start()
+
+    def on_end(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass  # drop rather than slow down the bot
+
+    def _drain(self, first: Optional[Span] = None) -> List[Span]:
+        batch = [first] if first else []
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self.interval)
+            except queue.Empty:
+                continue
+            self._export(self._drain(first))
+
+    def _export(self, batch: List[Span]) -> None:
+        if not batch:
+            return
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            print(f"Error exporting spans: {e}")
+
+    def flush(self) -> None:
+        while not self._queue.empty():
+            self._export(self._drain())
+
+
+_processor: Optional[BatchProcessor] = None
+_sample_rate = 1.0
+
+
+def configure(exporter: Optional[str] = None, sample_rate: Optional[float] = None) -> None:
+    """(Re)configure tracing, defaulting to the environment variables above."""
+    global _processor, _sample_rate
+    exporter = (exporter or os.environ.get("CLIF_TRACE_EXPORTER", "none")).lower()
+    if sample_rate is None:
+        sample_rate = float(os.environ.get("CLIF_TRACE_SAMPLE_RATE", "1"))
+    _sample_rate = min(1.0, max(0.0, sample_rate))
+    if exporter == "file":
+        _processor = BatchProcessor(FileExporter(os.environ.get("CLIF_TRACE_FILE", "clif_bot_traces.jsonl")))
+    elif exporter == "otlp":
+        _processor = BatchProcessor(
+            OtlpHttpExporter(os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318"))
+        )
+    else:
+        _processor = None
+
+
+def flush() -> None:
+    if _processor:
+        _processor.flush()
+
+
+@contextlib.contextmanager
+def start_span(name: str, kind: int = KIND_INTERNAL, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Open a span as a child of the current one.
+
+    Yields ``None`` when tracing is disabled so the hot path costs a single
+    attribute check.
+    """
+    if _processor is None:
+        yield None
+        return
+    parent = _current.get()
+    if parent is None:
+        span = Span(name, f"{random.getrandbits(128):032x}", "", random.random() < _sample_rate, kind)
+    else:
+        span = Span(name, parent.trace_id, parent.span_id, parent.sampled, kind)
+    for key, value in attributes.items():
+        span.set_attribute(key, value)
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_exception(e)
+        raise
+    finally:
+        _current.reset(token)
+        span.end_ns = time.time_ns()
+        if span.sampled and _processor is not None:
+            _processor.on_end(span)
+
+
+def traced(name: str) -> Callable:
+    """Decorate a function so each call runs inside a span called ``name``."""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _processor is None:
+                return func(*args, **kwargs)
+            with start_span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def propagate(func: Callable) -> Callable:
+    """Bind ``func`` to the current trace context for use in another thread.
+
+    ``threading.Thread`` and executors do not copy context variables, so
+    work handed to a background worker should be wrapped with this.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+
+    return wrapper
+
+
+class TracedClient:
+    """Proxy around a Slack ``WebClient`` that wraps each API call in a span."""
+
+    def __init__(self, client) -> None:
+        self._client = client
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            with start_span(f"slack.{name}", kind=KIND_CLIENT, **{"slack.method": name}):
+                return attr(*args, **kwargs)
+
+        return call
+
+
+def trace_listener(name: str) -> Callable:
+    """Decorate a Bolt listener with a root span covering the whole request.
+
+    The injected ``client`` is wrapped in :class:`TracedClient`, each
+    ``respond()`` gets a child span and ``ack()`` is recorded as a span event.
+    Calls made outside a listener, e.g. by scheduled jobs, should go through
+    a :class:`TracedClient` of their own.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _processor is None:
+                return func(*args, **kwargs)
+            with start_span(f"slack.listener {name}", kind=KIND_SERVER, **{"slack.listener": name}) as span:
+                body = kwargs.get("body") or {}
+                user = (body.get("user") or {}).get("id") or (kwargs.get("command") or {}).get("user_id")
+                span.set_attribute("slack.user_id", user)
+                if kwargs.get("client") is not None:
+                    kwargs["client"] = TracedClient(kwargs["client"])
+                respond = kwargs.get("respond")
+                if respond is not None:
+                    def traced_respond(*a, **kw):
+                        with start_span("slack.respond", kind=KIND_CLIENT):
+                            return respond(*a, **kw)
+
+                    kwargs["respond"] = traced_respond
+                ack = kwargs.get("ack")
+                if ack is not None:
+                    def traced_ack(*a, **kw):
+                        span.add_event("ack")
+                        return ack(*a, **kw)
+
+                    kwargs["ack"] = traced_ack
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+configure()
+atexit.register(flush)
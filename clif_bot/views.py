@@ -0,0 +1,327 @@
+"""Modal view templates, built once and shared between invocations.
+
+Each modal is registered with :func:`register` and built the first time it
+is requested.  :meth:`ViewTemplate.render` returns the cached view.  It
+copies only the containers on the path to a dynamic slot (a select's
+options, a section's text), so the template itself is never mutated.
+
+Option lists come from :data:`FRAGMENTS`.  Each list is keyed by what it
+depends on (the store's ``version``, the list of mCIDE tables), so it is
+only rebuilt when that changes.
+
+Rendered views share structure with the template and with each other, so
+treat them as read-only.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from .state import SITE_INDEX, SITES, STATUS_EMOJI
+
+Path = Tuple[Any, ...]
+
+
+def text(value: str) -> Dict[str, str]:
+    return {"type": "plain_text", "text": value}
+
+
+def option(label: str, value: Optional[str] = None) -> Dict[str, Any]:
+    return {"text": text(label), "value": label if value is None else value}
+
+
+def _patch(node: Any, path: Path, value: Any) -> Any:
+    """Copy of ``node`` with ``value`` at ``path``; ``None`` drops a dict key."""
+    head, rest = path[0], path[1:]
+    copy = list(node) if isinstance(node, list) else dict(node)
+    if rest:
+        copy[head] = _patch(node[head], rest, value)
+    elif value is None and isinstance(copy, dict):
+        copy.pop(head, None)
+    else:
+        copy[head] = value
+    return copy
+
+
+class ViewTemplate:
+    """A modal view plus the paths of its dynamic slots."""
+
+    def __init__(self, name: str, view: Dict[str, Any], slots: Optional[Dict[str, Path]] = None) -> None:
+        self.name = name
+        self.view = view
+        self.slots = slots or {}
+
+    def render(self, **values: Any) -> Dict[str, Any]:
+        """Return the view with ``values`` filled into the named slots."""
+        view = self.view
+        for slot, value in values.items():
+            try:
+                path = self.slots[slot]
+            except KeyError:
+                raise ValueError(f"View {self.name!r} has no slot {slot!r}") from None
+            view = _patch(view, path, value)
+        return view
+
+
+_BUILDERS: Dict[str, Tuple[Callable[[], Dict[str, Any]], Dict[str, Path]]] = {}
+_TEMPLATES: Dict[str, ViewTemplate] = {}
+
+
+def register(name: str, **slots: Path) -> Callable:
+    """Register a builder for the modal ``name`` with its slot paths."""
+
+    def decorator(builder: Callable[[], Dict[str, Any]]) -> Callable[[], Dict[str, Any]]:
+        _BUILDERS[name] = (builder, slots)
+        _TEMPLATES.pop(name, None)
+        return builder
+
+    return decorator
+
+
+def template(name: str) -> ViewTemplate:
+    """Return the template for ``name``, building it on first use."""
+    cached = _TEMPLATES.get(name)
+    if cached is None:
+        builder, slots = _BUILDERS[name]
+        cached = _TEMPLATES[name] = ViewTemplate(name, builder(), slots)
+    return cached
+
+
+def render(name: str, **values: Any) -> Dict[str, Any]:
+    return template(name).render(**values)
+
+
+class FragmentCache:
+    """Small LRU cache of view fragments keyed by what they are built from.
+
+    Shared by every Bolt worker thread.  ``build`` runs outside the lock (it
+    may take the store's), so two threads can occasionally build the same
+    fragment; the last one wins.
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+
+FRAGMENTS = FragmentCache()
+
+
+def text_options(values: Sequence[str]) -> List[Dict[str, Any]]:
+    """Select options for a list of strings (mCIDE tables, variables)."""
+    key = ("options", tuple(values))
+    return FRAGMENTS.get(key, lambda: [option(v) for v in key[1]])
+
+
+def project_options(store) -> List[Dict[str, Any]]:
+    """"General" plus one option per active project in ``store``."""
+
+    def build() -> List[Dict[str, Any]]:
+        options = [option("General (all projects)", "General")]
+        for _, project_status in store.items():
+            name = project_status.metadata.project_name
+            # Truncate long project names for dropdown
+            options.append(option(name[:50] + "..." if len(name) > 50 else name, name))
+        return options
+
+    return FRAGMENTS.get(("projects", store.version), build)
+
+
+STATUS_LABELS = ("❓ Not started", "🛠 In Progress", "✅ Completed", "❌ Will Not Participate")
+# Indexed by state.Status code.
+STATUS_OPTIONS = [option(label, emoji) for label, emoji in zip(STATUS_LABELS, STATUS_EMOJI)]
+# Slack allows at most 100 blocks in a modal; one is the header.
+MAX_MODAL_PROJECTS = 99
+
+
+def project_status_blocks(projects: Sequence[Tuple[str, Any]], site_index: int) -> List[Dict[str, Any]]:
+    """One status select per ``(repo_url, ProjectStatus)``, keyed by repo URL."""
+    blocks = []
+    for repo_url, project in projects[:MAX_MODAL_PROJECTS]:
+        blocks.append({
+            "type": "input",
+            "block_id": repo_url,
+            "element": {
+                "type": "static_select",
+                "action_id": "status_select",
+                "options": STATUS_OPTIONS,
+                "initial_option": STATUS_OPTIONS[project.codes[site_index]],
+            },
+            "label": text(project.metadata.project_name),
+            "hint": text(repo_url),
+            "optional": True,
+        })
+    return blocks
+
+
+def values_text(values: Sequence[str]) -> str:
+    return "*Existing values:* " + ", ".join(values) if values else "*Existing values:*"
+
+
+# --- modals -----------------------------------------------------------------
+def _text_input(block_id: str, action_id: str, label: str, placeholder: Optional[str] = None,
+                multiline: bool = False, optional: bool = False) -> Dict[str, Any]:
+    element: Dict[str, Any] = {"type": "plain_text_input", "action_id": action_id}
+    if multiline:
+        element["multiline"] = True
+    if placeholder:
+        element["placeholder"] = text(placeholder)
+    block = {"type": "input", "block_id": block_id, "element": element, "label": text(label)}
+    if optional:
+        block["optional"] = True
+    return block
+
+
+def _modal(callback_id: str, title: str, submit: str, blocks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "type": "modal",
+        "callback_id": callback_id,
+        "title": text(title),
+        "submit": text(submit),
+        "close": text("Cancel"),
+        "blocks": blocks,
+    }
+
+
+@register("clif_project_modal")
+def _project_modal() -> Dict[str, Any]:
+    return _modal("clif_project_modal", "CLIF Project Release", "Release Project", [
+        _text_input("github_url_block", "github_url", "GitHub Repository URL",
+                    "https://github.com/Common-Longitudinal-ICU-data-Format/project-name"),
+        _text_input("project_name_block", "project_name", "Project Name", "Enter project name"),
+        _text_input("result_box_block", "result_box_link", "Result Box Link", "Enter result box link"),
+        _text_input("special_instructions_block", "special_instructions", "Special Instructions",
+                    "Enter any special instructions", multiline=True, optional=True),
+    ])
+
+
+@register("clif_issue_modal", blocks=("blocks",))
+def _issue_modal() -> Dict[str, Any]:
+    title = _text_input("title_block", "title_input", "Title", "Enter issue title")
+    # Send a block action as the title is typed, to look up duplicates.
+    title["dispatch_action"] = True
+    title["element"]["dispatch_action_config"] = {"trigger_actions_on": ["on_character_entered"]}
+    return _modal("clif_issue_modal", "New CLIF Issue", "Create Issue", [
+        title,
+        _text_input("description_block", "description_input", "Description", "Describe the issue",
+                    multiline=True, optional=True),
+    ])
+
+
+def issue_view(duplicates: Optional[str] = None) -> Dict[str, Any]:
+    """The issue modal, with a ``duplicates`` section under the title if given."""
+    if not duplicates:
+        return render("clif_issue_modal")
+    title, *rest = template("clif_issue_modal").view["blocks"]
+    section = {"type": "section", "block_id": "duplicates_block", "text": {"type": "mrkdwn", "text": duplicates}}
+    return render("clif_issue_modal", blocks=[title, section, *rest])
+
+
+@register("clif_help_modal")
+def _help_modal() -> Dict[str, Any]:
+    return _modal("clif_help_modal", "Request CLIF Help", "Submit Ticket", [
+        _text_input("summary_block", "summary_input", "Summary", "Brief summary"),
+        _text_input("details_block", "details_input", "Details", "Describe your issue or question", multiline=True),
+    ])
+
+
+@register(
+    "clif_site_poc_modal",
+    project_options=("blocks", 2, "element", "options"),
+)
+def _site_poc_modal() -> Dict[str, Any]:
+    return _modal("clif_site_poc_modal", "Assign Site POC", "Assign POC", [
+        {
+            "type": "input",
+            "block_id": "site_block",
+            "element": {
+                "type": "static_select",
+                "placeholder": text("Select a CLIF site"),
+                "options": [option(site) for site in SITES],
+                "action_id": "site_select",
+            },
+            "label": text("CLIF Site"),
+        },
+        {
+            "type": "input",
+            "block_id": "user_block",
+            "element": {"type": "users_select", "placeholder": text("Select a user"), "action_id": "user_select"},
+            "label": text("Point of Contact"),
+        },
+        {
+            "type": "input",
+            "block_id": "project_block",
+            "element": {
+                "type": "static_select",
+                "placeholder": text("Select a project"),
+                "options": [],
+                "action_id": "project_select",
+            },
+            "label": text("Project"),
+            "optional": True,
+        },
+    ])
+
+
+@register(
+    "mcide_modal",
+    table_options=("blocks", 0, "element", "options"),
+    table=("blocks", 0, "element", "initial_option"),
+    variable_options=("blocks", 1, "element", "options"),
+    variable=("blocks", 1, "element", "initial_option"),
+    values_text=("blocks", 2, "text", "text"),
+)
+def _mcide_modal() -> Dict[str, Any]:
+    return _modal("mcide_modal", "mCIDE", "Submit", [
+        {
+            "type": "input",
+            "block_id": "table_block",
+            "element": {"type": "static_select", "action_id": "mcide_table_select", "options": []},
+            "label": text("CLIF Table"),
+        },
+        {
+            "type": "input",
+            "block_id": "variable_block",
+            "element": {"type": "static_select", "action_id": "mcide_variable_select", "options": []},
+            "label": text("Category Variable"),
+            "optional": False,
+        },
+        {"type": "section", "block_id": "values_block", "text": {"type": "mrkdwn", "text": values_text([])}},
+        _text_input("new_value_block", "new_value", "New Value"),
+    ])
+
+
+@register("clif_my_projects_modal", site=("private_metadata",), blocks=("blocks",))
+def _my_projects_modal() -> Dict[str, Any]:
+    view = _modal("clif_my_projects_modal", "My CLIF Projects", "Update Statuses", [])
+    view["private_metadata"] = ""
+    return view
+
+
+def my_projects_view(site: str, projects: Sequence[Tuple[str, Any]], page: int = 1) -> Dict[str, Any]:
+    """Status selects for one page of ``site``'s open projects, with the site in ``private_metadata``."""
+    start = (page - 1) * MAX_MODAL_PROJECTS
+    shown = projects[start:start + MAX_MODAL_PROJECTS]
+    header = f"*{site}*: {len(projects)} open project{'s' if len(projects) != 1 else ''}."
+    if len(shown) < len(projects):
+        header += f" Showing {start + 1}–{start + len(shown)}."
+        if start + len(shown) < len(projects):
+            header += f" Run `/clif-my-projects {page + 1}` for the next page."
+    blocks = [{"type": "section", "block_id": "header_block", "text": {"type": "mrkdwn", "text": header}}]
+    blocks += project_status_blocks(shown, SITE_INDEX[site])
+    return render("clif_my_projects_modal", site=site, blocks=blocks)
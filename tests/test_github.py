@@ -0,0 +1,144 @@
+import pathlib
+import sys
+from collections import OrderedDict
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from benchmarks.fakes import CLIF_REPO, FakeGitHub
+from clif_bot import github, mcide
+from clif_bot.github import RateLimitBudget
+
+
+def _headers(remaining, limit=60, reset=2_000_000_000):
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(reset),
+        "X-RateLimit-Resource": "core",
+    }
+
+
+def test_budget_pauses_reads_before_writes():
+    budget = RateLimitBudget(reserve=5)
+    assert budget.allow("read", now=0)  # nothing known yet
+    budget.update(_headers(6), now=0)
+    assert budget.allow("read", now=0)
+    budget.update(_headers(5), now=0)
+    assert not budget.allow("read", now=0)
+    assert budget.allow("write", now=0)
+    budget.update(_headers(0), now=0)
+    assert not budget.allow("write", now=0)
+
+
+def test_budget_recovers_after_reset():
+    budget = RateLimitBudget(reserve=5)
+    budget.update(_headers(0, reset=100), now=0)
+    assert not budget.allow("read", now=50)
+    assert budget.allow("read", now=100)
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    server = FakeGitHub(tables=2, variables=1, values=2).start()
+    monkeypatch.setattr(github, "API_URL", f"{server.url}/api")
+    monkeypatch.setattr(github, "RAW_URL", f"{server.url}/raw")
+    monkeypatch.setattr(github, "BUDGET", RateLimitBudget(reserve=5))
+    monkeypatch.setattr(github, "_cache", OrderedDict())
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def statuses(monkeypatch):
+    """Status codes of the responses get_json() receives."""
+    seen = []
+    request = github.request
+
+    def spy(*args, **kwargs):
+        response = request(*args, **kwargs)
+        seen.append(response.status_code)
+        return response
+
+    monkeypatch.setattr(github, "request", spy)
+    return seen
+
+
+def _contents(table="table00"):
+    return f"{github.API_URL}/repos/{CLIF_REPO}/contents/mCIDE/{table}"
+
+
+def test_get_json_revalidates_with_etag(fake, statuses, monkeypatch):
+    first = github.get_json(_contents())
+    assert github.get_json(_contents()) == first
+    assert statuses == [200, 304]
+
+    # Least recently used entries are evicted and fetched in full again.
+    monkeypatch.setattr(github, "_CACHE_SIZE", 1)
+    github.get_json(_contents("table01"))
+    assert list(github._cache) == [_contents("table01")]
+    assert github.get_json(_contents()) == first
+    assert statuses == [200, 304, 200, 200]
+
+
+@pytest.mark.parametrize("status", [403, 429])
+def test_get_json_serves_cache_when_rate_limited(fake, statuses, status):
+    cached = github.get_json(_contents())
+    fake.exhaust_rate_limit(status)
+    assert github.get_json(_contents()) == cached
+    assert statuses == [200, status]
+
+    # The budget now refuses reads before they are sent.
+    seen = len(fake.requests)
+    assert github.get_json(_contents()) == cached
+    assert len(fake.requests) == seen
+    with pytest.raises(github.RateLimitExceeded):
+        github.get_json(_contents("table01"))
+
+
+def test_get_json_serves_cache_when_budget_is_spent(fake):
+    cached = github.get_json(_contents())
+    github.BUDGET.update(_headers(5, reset=4102444800))
+    seen = len(fake.requests)
+    assert github.get_json(_contents()) == cached
+    assert len(fake.requests) == seen
+    with pytest.raises(github.RateLimitExceeded):
+        github.get_json(_contents("table01"))
+
+
+def test_request_merges_auth_headers(fake, monkeypatch):
+    sent = []
+    session = github.get_session()
+
+    class Recorder:
+        def request(self, method, url, **kwargs):
+            sent.append(kwargs.get("headers"))
+            return session.request(method, url, **kwargs)
+
+    monkeypatch.setattr(github, "get_session", Recorder)
+    monkeypatch.setenv("GITHUB_TOKEN", "t0k")
+    github.get(_contents(), headers={"Accept": "application/vnd.github+json"})
+    github.get(_contents(), headers={"Authorization": "token other"})
+    github.get(f"{github.RAW_URL}/{CLIF_REPO}/main/mCIDE/table00/README.md")
+    assert sent == [
+        {"Authorization": "token t0k", "Accept": "application/vnd.github+json"},
+        {"Authorization": "token other"},
+        None,
+    ]
+
+
+def test_update_category_csv_reads_with_write_priority(fake, monkeypatch):
+    monkeypatch.setattr(mcide, "API_URL", github.API_URL)
+    monkeypatch.setenv("GITHUB_TOKEN", "t0k")
+    # Every response leaves fewer calls than the reserve, so plain reads are refused.
+    monkeypatch.setattr(github, "BUDGET", RateLimitBudget(reserve=fake.rate_limit))
+    github.BUDGET.update(_headers(100, reset=4102444800))
+    with pytest.raises(github.RateLimitExceeded):
+        github.get(_contents())
+
+    url = mcide.update_category_csv("table00", "var0_category", "new_value")
+    assert url.endswith("/pull/1")
+    path = "mCIDE/table00/clif_table00_var0_category_categories.csv"
+    assert fake.repos[CLIF_REPO][path].splitlines()[-1] == "new_value"
@@ -0,0 +1,58 @@
+import pathlib
+import sys
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from benchmarks.fakes import FakeGitHub
+from clif_bot import issues
+
+
+def test_search_ranks_title_matches_and_prefixes():
+    index = issues.IssueIndex()
+    index.upsert({"number": 1, "title": "Vitals table missing heart rate units", "body": "", "updated_at": "1"})
+    index.upsert({"number": 2, "title": "Add lactate to labs", "body": "vitals are fine", "updated_at": "2"})
+    index.upsert({"number": 3, "title": "Docs typo", "body": "", "pull_request": {}, "updated_at": "3"})
+
+    results = index.search("heart rate units missing in vit")
+    assert [issue["number"] for _, issue in results] == [1]
+    assert results[0][0] > 0.8
+    assert index.search("completely unrelated words") == []
+    assert 3 not in index.issues
+
+    index.upsert({"number": 1, "title": "Respiratory support modes", "body": "", "updated_at": "4"})
+    assert index.search("heart rate units") == []
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    server = FakeGitHub(tables=1, variables=1, values=1).start()
+    monkeypatch.setattr(issues, "API_URL", f"{server.url}/api")
+    yield server
+    server.stop()
+
+
+def test_sync_is_incremental_and_persisted(fake, tmp_path, monkeypatch):
+    monkeypatch.setattr(issues, "PER_PAGE", 2)
+    for i in range(5):
+        fake.add_issue(f"Issue number {i}", "body text")
+    path = str(tmp_path / "issues.json")
+    index = issues.IssueIndex(path)
+    assert index.sync() == 5
+    assert len(index.issues) == 5
+
+    # Nothing changed: one request re-sends the newest issue, after which
+    # the same query is answered by a 304.
+    assert index.sync() == 0
+    seen = len(fake.requests)
+    assert index.sync() == 0
+    assert len(fake.requests) == seen + 1
+
+    fake.add_issue("Sepsis flag missing from hospitalization", updated_at="2024-02-01T00:00:00Z")
+    reloaded = issues.IssueIndex(path)
+    assert not reloaded.issues  # read lazily
+    assert reloaded.search("sepsis flag") == []
+    assert len(reloaded.issues) == 5
+    assert reloaded.sync() == 1
+    assert reloaded.search("sepsis flag")[0][1]["number"] == 6
@@ -0,0 +1,63 @@
+import pathlib
+import sys
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from benchmarks.fakes import CLIF_REPO, FakeGitHub
+from clif_bot import mcide
+
+
+def test_diff_catalogs_reports_added_and_removed_values():
+    old = {"labs": {"lab_category": ("albumin", "sodium")}, "vitals": {"vital_category": ("hr",)}}
+    new = {"labs": {"lab_category": ("sodium", "lactate")}, "meds": {"med_category": ("heparin",)}}
+    diffs = mcide.diff_catalogs(old, new)
+    assert [(d.table, d.variable, d.added, d.removed) for d in diffs] == [
+        ("labs", "lab_category", ["lactate"], ["albumin"]),
+        ("meds", "med_category", ["heparin"], []),
+        ("vitals", "vital_category", [], ["hr"]),
+    ]
+    assert mcide.diff_catalogs(old, old) == []
+
+
+def test_format_diff_is_capped_for_slack():
+    diffs = [mcide.CategoryDiff(f"t{i}", "v_category", [f"value_{j}" for j in range(50)], []) for i in range(200)]
+    text = mcide.format_diff("v1", "v2", diffs)
+    lines = text.splitlines()
+    assert len(text) <= mcide.MAX_DIFF_CHARS + 100
+    assert len(lines) <= mcide.MAX_DIFF_LINES + 1
+    assert lines[2].endswith("…and 30 more")
+    shown = sum(line.startswith("*t") for line in lines)
+    assert lines[-1] == f"…and {200 - shown} more variables."
+
+
+@pytest.fixture
+def fake(tmp_path, monkeypatch):
+    server = FakeGitHub(tables=2, variables=2, values=3).start()
+    monkeypatch.setattr(mcide, "API_URL", f"{server.url}/api")
+    monkeypatch.setattr(mcide, "RAW_URL", f"{server.url}/raw")
+    monkeypatch.setattr(mcide, "CATALOG_DIR", str(tmp_path))
+    monkeypatch.setattr(mcide, "_catalogs", mcide.OrderedDict())
+    yield server
+    server.stop()
+
+
+def test_catalogs_are_pinned_to_a_ref_and_cached(fake):
+    fake.tag("v1")
+    fake.add_file(CLIF_REPO, "mCIDE/table00/clif_table00_var0_category_categories.csv", "category\nnew_value\n")
+    fake.tag("v2")
+
+    sha1, v1 = mcide.fetch_catalog("v1")
+    assert v1["table00"]["var0_category"] == ("category", "value_0_0_0", "value_0_0_1", "value_0_0_2")
+    assert set(v1) == {"table00", "table01"}
+    _, _, diffs = mcide.diff("v1", "v2")
+    assert [(d.table, d.variable, d.added) for d in diffs] == [("table00", "var0_category", ["new_value"])]
+
+    # Known SHAs are served from the on-disk cache without listing or downloading.
+    mcide._catalogs.clear()
+    seen = len(fake.requests)
+    assert mcide.fetch_catalog(sha1) == (sha1, v1)
+    assert fake.requests[seen:] == []
+    with pytest.raises(ValueError):
+        mcide.resolve_ref("no-such-tag")
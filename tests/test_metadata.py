@@ -3,6 +3,8 @@ import sys
 
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
 
+from benchmarks.fakes import FakeGitHub
+from clif_bot import github, metadata
 from clif_bot.metadata import parse_repo
 
 
@@ -11,3 +13,88 @@ def test_parse_repo_reads_readme():
     metadata = parse_repo(repo)
     assert metadata.project_name
     assert metadata.description
+
+
+def test_parse_readme_lines_reads_inline_tables():
+    from clif_bot.metadata import parse_readme_lines
+
+    lines = ["# My Project", "", "Does a thing.", "Tables required: patient, labs; vitals"]
+    assert parse_readme_lines(lines) == ("My Project", "Does a thing.", ["patient", "labs", "vitals"])
+
+
+def test_parse_readme_lines_reads_list_tables_and_stops_early():
+    from clif_bot.metadata import parse_readme_lines
+
+    def lines():
+        yield from [
+            "# My Project",
+            "Does a thing.",
+            "## Tables required",
+            "",
+            "- `patient`",
+            "* [hospitalization](https://example.com)",
+            "1. vitals (optional)",
+            "## Next section",
+        ]
+        raise AssertionError("read past the fields it needs")
+
+    assert parse_readme_lines(lines()) == (
+        "My Project",
+        "Does a thing.",
+        ["patient", "hospitalization", "vitals"],
+    )
+
+
+def test_parse_readme_lines_keeps_underscores_in_table_names():
+    from clif_bot.metadata import parse_readme_lines
+
+    inline = ["# P", "D", "Tables required: respiratory_support, **medication_admin_continuous**, _labs_"]
+    assert parse_readme_lines(inline)[2] == ["respiratory_support", "medication_admin_continuous", "labs"]
+
+    listed = ["# P", "D", "## Tables required", "- `respiratory_support`", "- __medication_admin_continuous__",
+              "- *patient_assessments*", "## Next"]
+    assert parse_readme_lines(listed)[2] == ["respiratory_support", "medication_admin_continuous", "patient_assessments"]
+
+
+def test_parse_repo_normalises_tables_required(monkeypatch):
+    server = FakeGitHub(tables=0).start()
+    monkeypatch.setattr(metadata, "RAW_URL", f"{server.url}/raw")
+    try:
+        server.add_file("org/empty", "project.yaml", "project_name: Empty\ndescription: D\ntables_required:\n")
+        server.add_file("org/inline", "project.yaml", "project_name: Inline\ndescription: D\ntables_required: patient, labs; vitals\n")
+        assert parse_repo("https://github.com/org/empty").tables_required == []
+        assert parse_repo("https://github.com/org/inline").tables_required == ["patient", "labs", "vitals"]
+    finally:
+        server.stop()
+
+
+def test_parse_repo_stops_reading_large_readmes_at_the_cap(monkeypatch):
+    server = FakeGitHub(tables=0).start()
+    monkeypatch.setattr(metadata, "RAW_URL", f"{server.url}/raw")
+    filler = ["Filler line with enough text to take up some room."] * (2 * metadata.README_MAX_BYTES // 50)
+    server.add_file("org/big", "README.md", "\n".join(["# Big", "Large README."] + filler + ["Tables required: late"]))
+    responses, read = [], []
+    get = github.get
+
+    def spy(url, **kwargs):
+        response = get(url, **kwargs)
+        iter_content = response.iter_content
+
+        def counted(chunk_size):
+            for chunk in iter_content(chunk_size=chunk_size):
+                read.append(len(chunk))
+                yield chunk
+
+        response.iter_content = counted
+        responses.append(response)
+        return response
+
+    monkeypatch.setattr(github, "get", spy)
+    try:
+        result = parse_repo("https://github.com/org/big")
+    finally:
+        server.stop()
+
+    assert (result.project_name, result.description, result.tables_required) == ("Big", "Large README.", [])
+    assert metadata.README_MAX_BYTES <= sum(read) < metadata.README_MAX_BYTES + 8192
+    assert responses[-1].raw.closed
@@ -0,0 +1,50 @@
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from clif_bot import metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = metrics.Histogram("test_seconds", "Test histogram.", ["listener"], buckets=(0.1, 1.0))
+    hist.observe(0.05, listener="a")
+    hist.observe(0.5, listener="a")
+    hist.observe(5, listener="a")
+    text = "\n".join(hist.render())
+    assert 'test_seconds_bucket{listener="a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{listener="a",le="1"} 2' in text
+    assert 'test_seconds_bucket{listener="a",le="+Inf"} 3' in text
+    assert 'test_seconds_count{listener="a"} 3' in text
+
+
+def test_instrument_listener_times_ack_and_keeps_signature():
+    import inspect
+
+    @metrics.instrument_listener("test-listener")
+    def listener(ack, body):
+        ack()
+        return body
+
+    assert inspect.getfullargspec(inspect.unwrap(listener)).args == ["ack", "body"]
+    assert listener(ack=lambda: None, body=1) == 1
+    assert metrics.LISTENER_ACK_SECONDS.count(listener="test-listener") == 1
+    assert metrics.LISTENER_SECONDS.count(listener="test-listener") == 1
+
+
+def test_metrics_log_writes_one_line_per_listener_call(monkeypatch, capsys):
+    import json
+
+    @metrics.instrument_listener("logged-listener")
+    def listener(ack):
+        ack()
+
+    listener(ack=lambda: None)
+    assert capsys.readouterr().err == ""
+
+    monkeypatch.setenv("CLIF_METRICS_LOG", "1")
+    listener(ack=lambda: None)
+    listener(ack=lambda: None)
+    lines = capsys.readouterr().err.splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])["listener"] == "logged-listener"
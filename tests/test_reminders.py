@@ -0,0 +1,111 @@
+import pathlib
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from benchmarks.fakes import FakeSlackClient
+from clif_bot.metadata import ProjectMetadata
+from clif_bot.reminders import DigestReminder, QuietHours, Scheduler
+from clif_bot.state import SITES, ProjectStatus, StatusStore
+
+DAY = 86400.0
+# 2024-01-01 12:00 UTC
+NOON = datetime(2024, 1, 1, 12, tzinfo=timezone.utc).timestamp()
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+        self.slept = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class RateLimitedSlack(FakeSlackClient):
+    """Fails the first ``limited`` posts with a 429."""
+
+    def __init__(self, limited: int) -> None:
+        super().__init__()
+        self.limited = limited
+
+    def chat_postMessage(self, **kwargs):
+        if self.limited:
+            self.limited -= 1
+            error = RuntimeError("ratelimited")
+            error.response = type("Response", (), {"status_code": 429, "headers": {"Retry-After": "30"}})()
+            raise error
+        return super().chat_postMessage(**kwargs)
+
+
+def _store(tmp_path, clock):
+    store = StatusStore(str(tmp_path / "data.json"))
+    for i in range(3):
+        store.projects[f"https://github.com/org/p{i}"] = ProjectStatus(
+            ProjectMetadata(f"P{i}", "desc", []), released_at=clock.now - 3 * DAY
+        )
+    store.projects["https://github.com/org/new"] = ProjectStatus(
+        ProjectMetadata("New", "desc", []), released_at=clock.now
+    )
+    store.projects["https://github.com/org/legacy"] = ProjectStatus(ProjectMetadata("Legacy", "desc", []))
+    store.set_site_status("https://github.com/org/p0", SITES[0], "✅")
+    store.set_poc(SITES[0], "U1")
+    store.set_poc(SITES[1], "U2", "P2")
+    return store
+
+
+def test_one_digest_per_poc_with_rate_limit_backoff(tmp_path):
+    clock = FakeClock(NOON)
+    store = _store(tmp_path, clock)
+    client = RateLimitedSlack(limited=1)
+    digest = DigestReminder(store, client, interval=DAY, min_age=DAY, sleep=clock.sleep)
+
+    assert digest(clock()) == NOON + DAY
+    posts = [kwargs for method, kwargs in client.calls if method == "chat.postMessage"]
+    assert [p["channel"] for p in posts] == ["U1", "U2"]
+    assert "P1" in posts[0]["text"] and "P2" in posts[0]["text"]
+    assert "P0" not in posts[0]["text"] and "New" not in posts[0]["text"] and "Legacy" not in posts[0]["text"]
+    assert "P2" in posts[1]["text"] and "P1" not in posts[1]["text"]
+    assert clock.slept == [30.0, 1.0]
+
+
+def test_scheduler_persists_schedule_and_honours_quiet_hours(tmp_path):
+    clock = FakeClock(NOON)
+    store = _store(tmp_path, clock)
+    client = FakeSlackClient()
+    quiet = QuietHours.parse("11:00-13:30", timezone.utc)
+    digest = DigestReminder(store, client, interval=DAY, min_age=DAY, quiet=quiet, sleep=clock.sleep)
+    path = str(tmp_path / "schedule.json")
+    scheduler = Scheduler(path, clock)
+    scheduler.add("digest", digest, first_due=NOON)
+
+    assert scheduler.run_pending() == ["digest"]
+    assert client.calls == []
+    assert scheduler.due("digest") == NOON + 1.5 * 3600
+    clock.now = NOON + 3600
+    assert scheduler.run_pending() == []
+
+    restarted = Scheduler(path, clock)
+    restarted.add("digest", digest, first_due=NOON + 10 * DAY)
+    assert restarted.next_due() == NOON + 1.5 * 3600
+    clock.now = NOON + 2 * 3600
+    assert restarted.run_pending() == ["digest"]
+    assert len(client.calls) == 2
+    assert restarted.due("digest") == NOON + 2 * 3600 + DAY
+
+
+def test_reminders_are_off_unless_configured(tmp_path, monkeypatch):
+    from clif_bot import reminders
+
+    store = StatusStore(str(tmp_path / "data.json"))
+    scheduler = reminders.Scheduler()
+    monkeypatch.delenv("CLIF_REMINDER_INTERVAL_HOURS", raising=False)
+    assert not reminders.configure(FakeSlackClient(), store, scheduler)
+    monkeypatch.setenv("CLIF_REMINDER_INTERVAL_HOURS", "24")
+    assert reminders.configure(FakeSlackClient(), store, scheduler)
+    assert scheduler.due("digest") is not None
@@ -0,0 +1,41 @@
+import json
+import pathlib
+import subprocess
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from benchmarks import replay
+from clif_bot import recording
+
+
+def test_recording_drops_token_and_round_trips(tmp_path):
+    path = str(tmp_path / "recorded.jsonl")
+    record = recording.middleware(path)
+    body = {"token": "secret", "type": "block_actions", "user": {"id": "U1"},
+            "actions": [{"action_id": "status_update", "value": "repo|🛠"}]}
+    assert record(body, lambda: "next") == "next"
+    record({"command": "/clif-status", "user_id": "U1"}, lambda: None)
+
+    bodies = replay.load_recording(path)
+    assert [replay.kind(b) for b in bodies] == ["status_update", "/clif-status"]
+    assert "token" not in bodies[0]
+    assert bodies[0]["actions"][0]["value"] == "repo|🛠"
+
+
+def test_synthetic_replay_leaves_store_consistent(tmp_path):
+    # app holds module-level state, so replay in a fresh interpreter.
+    run = lambda *args: subprocess.run(
+        [sys.executable, "-m", "benchmarks.replay", *args], cwd=ROOT, capture_output=True, text=True, timeout=120
+    )
+    load, data, report = (str(tmp_path / name) for name in ("load.jsonl", "data.json", "report.json"))
+    assert run("synth", "--out", load, "--data", data, "--events", "200", "--projects", "10").returncode == 0
+
+    result = run("replay", load, "--data", data, "--concurrency", "4", "--output", report)
+    assert result.returncode == 0, result.stdout + result.stderr
+    report = json.loads(pathlib.Path(report).read_text())
+    assert report["payloads"] == 200
+    assert report["consistency"] == {"ok": True, "problems": []}
+    assert report["errors"] == {"dispatch": [], "listeners": {}}
+    assert report["slack_calls"]["response_url"] > 0
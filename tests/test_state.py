@@ -0,0 +1,313 @@
+import json
+import pathlib
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from clif_bot.metadata import ProjectMetadata
+from clif_bot.state import SITES, ProjectStatus, Status, StatusStore, archive_job
+from clif_bot.stats import ALL_SITES, StatusEvent
+
+REPO = "https://github.com/example/project"
+
+
+def _store(tmp_path, **kwargs):
+    return StatusStore(str(tmp_path / "data.json"), **kwargs)
+
+
+def test_status_round_trips_through_existing_json_format(tmp_path):
+    store = _store(tmp_path)
+    store.new_project(REPO, ProjectMetadata("Project", "desc", ["patient", "labs"]))
+    store.set_site_status(REPO, SITES[1], "✅")
+
+    with open(store.data_file) as f:
+        data = json.load(f)
+    assert data["projects"][REPO]["site_status"][SITES[1]] == "✅"
+    assert data["projects"][REPO]["site_status"][SITES[0]] == "❓"
+    assert data["projects"][REPO]["metadata"]["tables_required"] == ["patient", "labs"]
+
+    reloaded = _store(tmp_path)
+    project = reloaded.projects[REPO]
+    assert project.get_status(SITES[1]) == "✅"
+    assert project.codes[1] == Status.COMPLETED
+    assert project.site_status == store.projects[REPO].site_status
+
+
+def test_unknown_status_and_site_are_rejected():
+    project = ProjectStatus(ProjectMetadata("Project", "", []))
+    with pytest.raises(ValueError):
+        project.set_status(SITES[0], "maybe")
+    with pytest.raises(ValueError):
+        project.set_status("Nowhere General", "✅")
+
+
+def test_null_or_string_tables_required_load_and_save(tmp_path):
+    data = {
+        "projects": {
+            REPO: {"metadata": {"project_name": "Null", "description": "", "tables_required": None}},
+            REPO + "-str": {"metadata": {"project_name": "Str", "description": "", "tables_required": "patient, labs"}},
+            REPO + "-after": {"metadata": {"project_name": "After", "description": "", "tables_required": ["vitals"]}},
+        },
+        "pocs": {"U1": SITES[0]},
+    }
+    (tmp_path / "data.json").write_text(json.dumps(data))
+
+    store = _store(tmp_path)
+    assert store.projects[REPO].metadata.tables_required == []
+    assert store.projects[REPO + "-str"].metadata.tables_required == ["patient", "labs"]
+    store.save_data()
+    saved = json.loads((tmp_path / "data.json").read_text())
+    assert list(saved["projects"]) == [REPO, REPO + "-str", REPO + "-after"]
+    assert saved["pocs"] == {"U1": SITES[0]}
+
+
+def test_loading_warns_about_dropped_sites_and_statuses(tmp_path, capsys):
+    data = {"projects": {REPO: {
+        "metadata": {"project_name": "Project", "description": "", "tables_required": []},
+        "site_status": {SITES[0]: "✅", SITES[1]: "maybe", "Nowhere General": "🛠"},
+    }}}
+    (tmp_path / "data.json").write_text(json.dumps(data))
+
+    store = _store(tmp_path)
+    assert store.projects[REPO].get_status(SITES[0]) == "✅"
+    assert store.projects[REPO].get_status(SITES[1]) == "❓"
+    out = capsys.readouterr().out
+    assert "unknown status 'maybe'" in out and "unknown site 'Nowhere General'" in out
+
+
+def test_status_table_lists_every_site(tmp_path):
+    store = _store(tmp_path)
+    store.new_project(REPO, ProjectMetadata("Project", "desc", []))
+    store.set_site_status(REPO, SITES[2], "🛠")
+    lines = store.status_table().splitlines()
+    assert len(lines) == len(SITES) + 2
+    assert "🛠" in lines[2 + 2]
+
+
+def test_finished_projects_move_to_archive(tmp_path):
+    store = _store(tmp_path)
+    store.new_project(REPO, ProjectMetadata("Project", "desc", []))
+    for i, site in enumerate(SITES):
+        store.set_site_status(REPO, site, "✅" if i % 2 else "❌")
+
+    assert REPO not in store.projects
+    reloaded = _store(tmp_path)
+    assert REPO not in reloaded.projects
+    entries, has_more = reloaded.archived_projects()
+    assert [repo for repo, _, _ in entries] == [REPO]
+    assert not has_more
+    assert entries[0][2].finished
+
+
+def test_archive_pages_and_age_threshold(tmp_path):
+    store = _store(tmp_path, archive_after_days=30)
+    for i in range(5):
+        store.new_project(f"{REPO}-{i}", ProjectMetadata(f"Project {i}", "", []))
+    now = store.projects[f"{REPO}-0"].released_at
+    assert store.archive_finished(now=now + 29 * 86400) == []
+    assert len(store.archive_finished(now=now + 31 * 86400)) == 5
+
+    first, more = store.archived_projects(page=1, per_page=2)
+    last, no_more = store.archived_projects(page=3, per_page=2)
+    assert [r for r, _, _ in first] == [f"{REPO}-0", f"{REPO}-1"] and more
+    assert [r for r, _, _ in last] == [f"{REPO}-4"] and not no_more
+
+
+def test_archive_job_sweeps_stale_projects(tmp_path):
+    store = _store(tmp_path, archive_after_days=30)
+    store.new_project(REPO, ProjectMetadata("Project", "", []))
+    job = archive_job(store, interval=86400)
+    released = store.projects[REPO].released_at
+    assert job(released + 29 * 86400) == released + 30 * 86400
+    assert REPO in store.projects
+    job(released + 31 * 86400)
+    assert REPO not in store.projects
+
+
+def test_status_changes_update_rollups(tmp_path):
+    store = _store(tmp_path)
+    store.new_project(REPO, ProjectMetadata("Project", "desc", []))
+    released = store.projects[REPO].released_at
+    store.set_site_status(REPO, SITES[0], "🛠")
+    store.set_site_status(REPO, SITES[0], "✅")
+    store.set_site_status(REPO, SITES[0], "✅")  # no-op, not an event
+
+    rollups = store.events.rollups
+    assert rollups.events_total == 3
+    assert rollups.site_counts[SITES[0]] == {"✅": 1}
+    assert rollups.site_counts[SITES[1]] == {"❓": 1}
+    assert rollups.project_counts[REPO] == {"❓": len(SITES) - 1, "✅": 1}
+    assert rollups.completion[SITES[0]].count == 1
+    assert rollups.completion[SITES[0]].percentile(50) >= 0
+
+    reloaded = _store(tmp_path)
+    assert reloaded.events.rollups.to_dict() == rollups.to_dict()
+    assert reloaded.events.rebuild().to_dict() == rollups.to_dict()
+    assert released
+
+
+def test_rollup_snapshot_is_a_copy(tmp_path):
+    store = _store(tmp_path)
+    store.new_project(REPO, ProjectMetadata("Project", "desc", []))
+    store.set_site_status(REPO, SITES[0], "✅")
+
+    snapshot = store.events.snapshot()
+    assert snapshot.to_dict() == store.events.rollups.to_dict()
+    store.set_site_status(REPO, SITES[1], "🛠")
+    assert snapshot.site_counts[SITES[1]] == {"❓": 1}
+    assert snapshot.project_counts[REPO] == {"❓": len(SITES) - 1, "✅": 1}
+
+
+def test_rerelease_resets_sites_without_double_counting(tmp_path):
+    store = _store(tmp_path)
+    store.new_project(REPO, ProjectMetadata("Project", "desc", []))
+    first = store.projects[REPO].released_at
+    store.set_site_status(REPO, SITES[0], "✅")
+    store.new_project(REPO, ProjectMetadata("Project", "desc", []))
+    store.set_site_status(REPO, SITES[0], "✅")
+
+    rollups = store.events.rollups
+    assert rollups.site_counts[SITES[0]] == {"✅": 1}
+    assert rollups.project_counts[REPO] == {"❓": len(SITES) - 1, "✅": 1}
+    assert rollups.released[REPO] == first
+    assert rollups.completion[SITES[0]].count == 1
+    assert rollups.to_dict() == store.events.rebuild().to_dict()
+
+
+def test_archiving_drops_per_project_rollups(tmp_path):
+    store = _store(tmp_path)
+    store.new_project(REPO, ProjectMetadata("Project", "desc", []))
+    store.new_project(REPO + "-open", ProjectMetadata("Open", "desc", []))
+    store.set_site_statuses(SITES[0], {REPO + "-open": "🛠"})
+    for site in SITES:
+        store.set_site_status(REPO, site, "✅")
+    assert REPO not in store.projects
+
+    rollups = store.events.rollups
+    for state in (rollups.project_counts, rollups.statuses, rollups.released, rollups.completed):
+        assert REPO not in state
+    assert list(rollups.released) == [REPO + "-open"]
+    assert rollups.site_counts[SITES[0]] == {"✅": 1, "🛠": 1}
+    assert rollups.completion[SITES[0]].count == 1
+    assert _store(tmp_path).events.rollups.to_dict() == rollups.to_dict() == store.events.rebuild().to_dict()
+
+
+def test_rollups_are_written_on_save_and_catch_up_from_the_log(tmp_path):
+    store = _store(tmp_path)
+    store.new_project(REPO, ProjectMetadata("Project", "desc", []))
+    stats_file = store.events.rollup_file
+    written = pathlib.Path(stats_file).read_text()
+
+    # Events recorded without a save (e.g. a crash before it) are replayed on load.
+    store.events.record([StatusEvent(time.time(), REPO, SITES[2], "❓", "🛠", store.projects[REPO].released_at)])
+    assert pathlib.Path(stats_file).read_text() == written
+    reloaded = _store(tmp_path)
+    assert reloaded.events.rollups.site_counts[SITES[2]] == {"🛠": 1}
+    assert reloaded.events.rollups.to_dict() == store.events.rollups.to_dict()
+
+
+def test_legacy_projects_without_release_time_are_not_seeded(tmp_path):
+    data = {"projects": {
+        REPO: {"metadata": {"project_name": "Old", "description": "", "tables_required": []},
+               "site_status": {SITES[0]: "✅"}},
+        REPO + "-new": {"metadata": {"project_name": "New", "description": "", "tables_required": []},
+                        "site_status": {SITES[0]: "🛠"}, "released_at": 1000.0},
+    }}
+    (tmp_path / "data.json").write_text(json.dumps(data))
+
+    rollups = _store(tmp_path).events.rollups
+    assert list(rollups.released) == [REPO + "-new"]
+    assert rollups.site_counts[SITES[0]] == {"🛠": 1}
+    assert not rollups.completion
+
+
+def test_seeded_completions_have_no_latency(tmp_path):
+    data = {"projects": {REPO: {
+        "metadata": {"project_name": "Old", "description": "", "tables_required": []},
+        "site_status": {SITES[0]: "✅", SITES[1]: "🛠"}, "released_at": 1000.0,
+    }}}
+    (tmp_path / "data.json").write_text(json.dumps(data))
+
+    store = _store(tmp_path)
+    store.set_site_status(REPO, SITES[1], "✅")
+    store.set_site_status(REPO, SITES[0], "🛠")
+    store.set_site_status(REPO, SITES[0], "✅")
+
+    rollups = store.events.rollups
+    assert rollups.site_counts[SITES[0]] == {"✅": 1}
+    assert rollups.completion[SITES[1]].count == 1
+    assert SITES[0] not in rollups.completion
+    assert rollups.completion[ALL_SITES].count == 1
+    assert _store(tmp_path).events.rollups.to_dict() == rollups.to_dict()
+
+
+def test_snapshot_loads_lazily_and_tracks_json(tmp_path):
+    store = _store(tmp_path)
+    for i in range(3):
+        store.new_project(f"{REPO}-{i}", ProjectMetadata(f"Project {i}", "desc", ["patient"]))
+    store.set_site_status(f"{REPO}-1", SITES[3], "🛠")
+    store.set_poc(SITES[3], "U1")
+
+    fast = _store(tmp_path)
+    assert fast.loaded_from_snapshot
+    assert list(fast.projects) == list(store.projects)
+    assert fast.projects.raw(f"{REPO}-1") is not None  # not decoded yet
+    assert fast.projects[f"{REPO}-1"].get_status(SITES[3]) == "🛠"
+    assert fast.projects.raw(f"{REPO}-1") is None
+    assert fast.get_site_for_user("U1") == SITES[3]
+
+    # A snapshot that no longer matches the JSON file is ignored.
+    with open(store.data_file, "a") as f:
+        f.write("\n")
+    slow = _store(tmp_path)
+    assert not slow.loaded_from_snapshot
+    assert slow.projects[f"{REPO}-1"].get_status(SITES[3]) == "🛠"
+
+
+def test_bulk_status_update_is_one_batch(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    repos = [f"{REPO}-{i}" for i in range(3)]
+    for repo in repos:
+        store.new_project(repo, ProjectMetadata(repo, "desc", []))
+    saves = []
+    monkeypatch.setattr(store, "save_data", lambda: saves.append(1))
+
+    with pytest.raises(ValueError):
+        store.set_site_statuses(SITES[0], {repos[0]: "✅", repos[1]: "maybe"})
+    assert store.projects[repos[0]].get_status(SITES[0]) == "❓"
+
+    events_before = store.events.rollups.events_total
+    changed, skipped = store.set_site_statuses(
+        SITES[0], {repos[0]: "✅", repos[1]: "❓", repos[2]: "🛠", f"{REPO}-gone": "✅"}
+    )
+    assert [(e.repo_url, e.old, e.new) for e in changed] == [(repos[0], "❓", "✅"), (repos[2], "❓", "🛠")]
+    assert skipped == [f"{REPO}-gone"]
+    assert saves == [1]
+    assert store.events.rollups.events_total == events_before + 2
+    assert store.events.rollups.site_counts[SITES[0]] == {"✅": 1, "❓": 1, "🛠": 1}
+
+
+def test_items_are_copied_under_the_store_lock(tmp_path):
+    store = _store(tmp_path)
+    store.new_project(REPO, ProjectMetadata(REPO, "desc", []))
+    store.set_poc(SITES[0], "U1")
+
+    items, pocs = store.items(), store.poc_items()
+    store.new_project(f"{REPO}-2", ProjectMetadata(f"{REPO}-2", "desc", []))
+    store.set_poc(SITES[1], "U2")
+    assert [url for url, _ in items] == [REPO]
+    assert pocs == [("U1", SITES[0])]
+
+    store._lock.acquire()
+    try:
+        reader = threading.Thread(target=store.items)
+        reader.start()
+        reader.join(0.1)
+        assert reader.is_alive()  # waits for the writer
+    finally:
+        store._lock.release()
+    reader.join()
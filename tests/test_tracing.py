@@ -0,0 +1,130 @@
+import json
+import pathlib
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from clif_bot import tracing
+
+
+class Collector:
+    def __init__(self):
+        self.spans = []
+
+    def on_end(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    collector = Collector()
+    monkeypatch.setattr(tracing, "_processor", collector)
+    monkeypatch.setattr(tracing, "_sample_rate", 1.0)
+    return collector.spans
+
+
+def test_child_spans_join_the_current_trace(spans):
+    with tracing.start_span("root") as root:
+        with tracing.start_span("child", kind=tracing.KIND_CLIENT, url="x") as child:
+            pass
+    with tracing.start_span("other") as other:
+        pass
+
+    assert [s.name for s in spans] == ["child", "root", "other"]
+    assert child.trace_id == root.trace_id and child.parent_id == root.span_id
+    assert child.attributes == {"url": "x"}
+    assert root.parent_id == "" and other.trace_id != root.trace_id
+    assert root.start_ns <= child.start_ns <= child.end_ns <= root.end_ns
+
+
+def test_exceptions_mark_the_span_as_failed(spans):
+    with pytest.raises(ValueError):
+        with tracing.start_span("boom"):
+            raise ValueError("bad")
+    assert spans[0].status == tracing.STATUS_ERROR
+    assert spans[0].events[0]["attributes"]["exception.type"] == "ValueError"
+
+
+def test_sample_rate_decides_for_the_whole_trace(spans, monkeypatch):
+    monkeypatch.setattr(tracing, "_sample_rate", 0.0)
+    with tracing.start_span("root") as root:
+        with tracing.start_span("child") as child:
+            child.set_attribute("dropped", True)
+    assert not root.sampled and not child.sampled and not child.attributes
+    assert spans == []
+
+    monkeypatch.setattr(tracing, "_sample_rate", 1.0)
+    with tracing.start_span("root"):
+        with tracing.start_span("child"):
+            pass
+    assert [s.name for s in spans] == ["child", "root"]
+
+
+def test_disabled_tracing_yields_no_span(monkeypatch):
+    monkeypatch.setattr(tracing, "_processor", None)
+    with tracing.start_span("root") as span:
+        assert span is None
+
+
+def test_propagate_carries_the_span_into_another_thread(spans):
+    def work():
+        with tracing.start_span("worker"):
+            pass
+
+    with tracing.start_span("root") as root:
+        threads = [threading.Thread(target=tracing.propagate(work)), threading.Thread(target=work)]
+        for thread in threads:
+            thread.start()
+            thread.join()
+
+    propagated, detached = (s for s in spans if s.name == "worker")
+    assert propagated.parent_id == root.span_id
+    assert detached.parent_id == "" and detached.trace_id != root.trace_id
+
+
+def test_file_exporter_writes_otlp_json(tmp_path, spans):
+    with tracing.start_span("root", count=3, ratio=0.5, ok=True, label="x", skipped=None) as root:
+        root.add_event("ack")
+    path = tmp_path / "traces.jsonl"
+    tracing.FileExporter(str(path)).export(spans)
+
+    (line,) = path.read_text().splitlines()
+    resource_spans = json.loads(line)["resourceSpans"][0]
+    assert resource_spans["resource"]["attributes"] == [
+        {"key": "service.name", "value": {"stringValue": tracing.SERVICE_NAME}}
+    ]
+    (span,) = resource_spans["scopeSpans"][0]["spans"]
+    assert span["traceId"] == root.trace_id and len(span["traceId"]) == 32 and len(span["spanId"]) == 16
+    assert "parentSpanId" not in span
+    assert span["kind"] == tracing.KIND_INTERNAL
+    assert int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"])
+    assert span["attributes"] == [
+        {"key": "count", "value": {"intValue": "3"}},
+        {"key": "ratio", "value": {"doubleValue": 0.5}},
+        {"key": "ok", "value": {"boolValue": True}},
+        {"key": "label", "value": {"stringValue": "x"}},
+    ]
+    assert span["events"][0]["name"] == "ack"
+    assert span["status"] == {"code": tracing.STATUS_UNSET, "message": ""}
+
+
+def test_trace_listener_records_ack_and_wraps_respond(spans):
+    calls = []
+
+    @tracing.trace_listener("/test")
+    def listener(ack, respond, command):
+        ack()
+        respond("done")
+
+    listener(ack=lambda: calls.append("ack"), respond=calls.append, command={"user_id": "U1"})
+
+    assert calls == ["ack", "done"]
+    respond_span, root = spans
+    assert root.name == "slack.listener /test" and root.kind == tracing.KIND_SERVER
+    assert root.attributes["slack.user_id"] == "U1"
+    assert [e["name"] for e in root.events] == ["ack"]
+    assert respond_span.name == "slack.respond" and respond_span.kind == tracing.KIND_CLIENT
+    assert respond_span.parent_id == root.span_id
@@ -0,0 +1,93 @@
+import pathlib
+import sys
+import threading
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from clif_bot import views
+from clif_bot.metadata import ProjectMetadata
+from clif_bot.state import SITES, ProjectStatus, StatusStore
+
+
+def test_render_patches_slots_without_touching_template():
+    template = views.template("mcide_modal")
+    options = views.text_options(["labs", "vitals"])
+    view = views.render("mcide_modal", table_options=options, table=options[0], variable=None,
+                        values_text=views.values_text(["a", "b"]))
+    assert view["blocks"][0]["element"]["options"] == options
+    assert view["blocks"][0]["element"]["initial_option"]["value"] == "labs"
+    assert "initial_option" not in view["blocks"][1]["element"]
+    assert view["blocks"][2]["text"]["text"] == "*Existing values:* a, b"
+    assert template.view["blocks"][0]["element"]["options"] == []
+    assert template.view["blocks"][2]["text"]["text"] == "*Existing values:*"
+    # Untouched blocks are shared with the template.
+    assert view["blocks"][3] is template.view["blocks"][3]
+    assert views.render("clif_help_modal") is views.template("clif_help_modal").view
+
+
+def test_site_poc_modal_uses_sites_and_tracks_projects(tmp_path):
+    store = StatusStore(str(tmp_path / "data.json"))
+    view = views.render("clif_site_poc_modal", project_options=views.project_options(store))
+    assert [o["value"] for o in view["blocks"][0]["element"]["options"]] == SITES
+    assert [o["value"] for o in view["blocks"][2]["element"]["options"]] == ["General"]
+    assert views.project_options(store) is views.project_options(store)
+
+    store.new_project("https://github.com/org/p1", ProjectMetadata("P" * 60, "desc", []))
+    options = views.project_options(store)
+    assert [o["value"] for o in options] == ["General", "P" * 60]
+    assert options[1]["text"]["text"] == "P" * 50 + "..."
+
+
+def test_my_projects_view_selects_current_status(tmp_path):
+    store = StatusStore(str(tmp_path / "data.json"))
+    store.new_project("https://github.com/org/p1", ProjectMetadata("P1", "desc", []))
+    store.set_site_status("https://github.com/org/p1", SITES[2], "🛠")
+    view = views.my_projects_view(SITES[2], list(store.projects.items()))
+    assert view["private_metadata"] == SITES[2]
+    block = view["blocks"][1]
+    assert block["block_id"] == "https://github.com/org/p1"
+    assert block["element"]["initial_option"]["value"] == "🛠"
+    assert views.template("clif_my_projects_modal").view["blocks"] == []
+
+
+def test_my_projects_view_pages_long_lists(tmp_path):
+    store = StatusStore(str(tmp_path / "data.json"))
+    for i in range(views.MAX_MODAL_PROJECTS + 5):
+        store.projects[f"https://github.com/org/p{i}"] = ProjectStatus(ProjectMetadata(f"P{i}", "", []))
+    projects = list(store.projects.items())
+
+    first = views.my_projects_view(SITES[0], projects)
+    assert len(first["blocks"]) == views.MAX_MODAL_PROJECTS + 1
+    assert "`/clif-my-projects 2`" in first["blocks"][0]["text"]["text"]
+    second = views.my_projects_view(SITES[0], projects, page=2)
+    assert [b["block_id"] for b in second["blocks"][1:]] == [url for url, _ in projects[views.MAX_MODAL_PROJECTS:]]
+    assert "next page" not in second["blocks"][0]["text"]["text"]
+
+
+def test_fragment_cache_is_safe_across_threads():
+    cache = views.FragmentCache(maxsize=4)
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(2000):
+                key = (offset + i) % 10
+                assert cache.get(key, lambda: [key]) == [key]
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(cache._entries) == 4
+
+
+def test_issue_view_inserts_duplicates_under_title():
+    plain = views.issue_view()
+    view = views.issue_view("*Possible duplicates:*\n#1")
+    assert [b["block_id"] for b in view["blocks"]] == ["title_block", "duplicates_block", "description_block"]
+    assert [b["block_id"] for b in plain["blocks"]] == ["title_block", "description_block"]
+    assert plain["blocks"][0]["dispatch_action"] is True